@@ -0,0 +1,260 @@
+"""
+Substituts hors ligne de Red, Config et du contexte de commande.
+Reproduisent le comportement utile au cog (copies profondes de Config,
+verrou par valeur, envois comptés) sans connexion Discord.
+"""
+
+import asyncio
+import copy
+import importlib
+import sys
+import types
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import discord
+
+COG_ROOT = Path(__file__).resolve().parent.parent
+COG_PACKAGE = "red_owl_cog"
+
+
+def load_cog_module(name: str):
+    """Importe un module du cog sans exécuter le `__init__` du paquet."""
+    if COG_PACKAGE not in sys.modules:
+        package = types.ModuleType(COG_PACKAGE)
+        package.__path__ = [str(COG_ROOT)]
+        sys.modules[COG_PACKAGE] = package
+    return importlib.import_module(f"{COG_PACKAGE}.{name}")
+
+
+class _ValueCtx:
+    def __init__(self, value: "FakeValue"):
+        self._value = value
+        self._raw = None
+
+    def __await__(self):
+        return self._get().__await__()
+
+    async def _get(self):
+        return copy.deepcopy(self._value._read())
+
+    async def __aenter__(self):
+        await self._value.lock.acquire()
+        self._raw = copy.deepcopy(self._value._read())
+        return self._raw
+
+    async def __aexit__(self, *exc):
+        try:
+            self._value._write(self._raw)
+        finally:
+            self._value.lock.release()
+
+
+class FakeValue:
+    def __init__(self, config: "FakeConfig", key: int, name: str):
+        self._config = config
+        self._key = key
+        self._name = name
+        self.lock = config._lock_for(key, name)
+
+    def _read(self):
+        data = self._config.users.get(self._key)
+        if data is None or self._name not in data:
+            return self._config._user_defaults[self._name]
+        return data[self._name]
+
+    def _write(self, value):
+        self._config.users.setdefault(self._key, {})[self._name] = value
+
+    def __call__(self):
+        return _ValueCtx(self)
+
+    async def set(self, value):
+        self._write(copy.deepcopy(value))
+
+
+class FakeGroup:
+    def __init__(self, config: "FakeConfig", key: int):
+        self._config = config
+        self._key = key
+
+    def __getattr__(self, name):
+        if name.startswith("_") or name not in self._config._user_defaults:
+            raise AttributeError(name)
+        return FakeValue(self._config, self._key, name)
+
+
+class FakeConfig:
+    """Config en mémoire limitée au périmètre utilisateur."""
+
+    def __init__(self):
+        self.users: Dict[int, Dict[str, Any]] = {}
+        self._user_defaults: Dict[str, Any] = {}
+        self._locks: Dict[tuple, asyncio.Lock] = {}
+
+    def _lock_for(self, key: int, name: str) -> asyncio.Lock:
+        lock = self._locks.get((key, name))
+        if lock is None:
+            lock = self._locks[(key, name)] = asyncio.Lock()
+        return lock
+
+    def register_user(self, **defaults):
+        self._user_defaults.update(defaults)
+
+    def user(self, user):
+        return self.user_from_id(user.id)
+
+    def user_from_id(self, user_id: int):
+        return FakeGroup(self, user_id)
+
+    async def all_users(self):
+        return {
+            user_id: {**copy.deepcopy(self._user_defaults), **copy.deepcopy(data)}
+            for user_id, data in self.users.items()
+        }
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.display_name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.avatar = types.SimpleNamespace(url="https://cdn.invalid/avatar.png")
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, bot: Optional["FakeBot"] = None):
+        self.id = guild_id
+        self._bot = bot
+        # None : tous les utilisateurs sont membres.
+        self.member_ids: Optional[set] = None
+
+    def get_member(self, user_id: int) -> Optional[FakeUser]:
+        if self.member_ids is not None and user_id not in self.member_ids:
+            return None
+        return self._bot.get_user(user_id)
+
+    def get_channel_or_thread(self, channel_id: int):
+        channel = self._bot.get_channel(channel_id)
+        return channel if channel.guild is self else None
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, guild: Optional[FakeGuild] = None):
+        self.id = channel_id
+        self.guild = guild
+        self.sent = 0
+        self.fetches = 0
+        # Membres sans accès à l'historique du salon.
+        self.hidden_from: set = set()
+
+    def permissions_for(self, member):
+        return types.SimpleNamespace(
+            read_message_history=member.id not in self.hidden_from
+        )
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+    async def fetch_message(self, message_id: int):
+        """Simule un appel REST : chaque appel est compté."""
+        self.fetches += 1
+        await asyncio.sleep(0)
+        return types.SimpleNamespace(id=message_id, channel=self, guild=self.guild)
+
+
+class FakeAttachment:
+    def __init__(self, attachment_id: int, data: bytes, filename: str = "ref.png"):
+        self.id = attachment_id
+        self.url = f"https://cdn.invalid/attachments/{attachment_id}/{filename}"
+        self.filename = filename
+        self.content_type = "image/png"
+        self.size = len(data)
+        self.width = self.height = 1024
+        self._data = data
+        self.reads = 0
+
+    async def read(self) -> bytes:
+        self.reads += 1
+        await asyncio.sleep(0)
+        return self._data
+
+
+class FakeUploader:
+    """Stockage FAL local : retourne une URL factice par envoi."""
+
+    def __init__(self):
+        self.uploaded: List[int] = []
+
+    async def upload(self, session, data: bytes, content_type: str, filename: str):
+        self.uploaded.append(len(data))
+        await asyncio.sleep(0)
+        return f"https://fal.invalid/files/{len(self.uploaded)}/{filename}"
+
+
+class FakeBot:
+    """Bot minimal : tous les canaux et utilisateurs demandés existent."""
+
+    def __init__(self):
+        self._channels: Dict[int, FakeChannel] = {}
+        self._users: Dict[int, FakeUser] = {}
+        self._guilds: Dict[int, FakeGuild] = {}
+
+    @property
+    def loop(self):
+        return asyncio.get_running_loop()
+
+    async def wait_until_ready(self):
+        return None
+
+    def get_channel(self, channel_id: int) -> FakeChannel:
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = FakeChannel(channel_id)
+        return channel
+
+    def get_guild(self, guild_id: int) -> FakeGuild:
+        guild = self._guilds.get(guild_id)
+        if guild is None:
+            guild = self._guilds[guild_id] = FakeGuild(guild_id, self)
+        return guild
+
+    async def fetch_channel(self, channel_id: int):
+        raise discord.NotFound(
+            types.SimpleNamespace(status=404, reason="Not Found"), "Unknown Channel"
+        )
+
+    def get_user(self, user_id: int) -> FakeUser:
+        user = self._users.get(user_id)
+        if user is None:
+            user = self._users[user_id] = FakeUser(user_id)
+        return user
+
+    @property
+    def sent(self) -> int:
+        return sum(channel.sent for channel in self._channels.values())
+
+    @property
+    def fetches(self) -> int:
+        return sum(channel.fetches for channel in self._channels.values())
+
+
+class FakeContext:
+    def __init__(self, bot: FakeBot, user_id: int, channel_id: int, guild_id=None):
+        self.bot = bot
+        self.author = bot.get_user(user_id)
+        self.guild = bot.get_guild(guild_id) if guild_id is not None else None
+        self.channel = bot.get_channel(channel_id)
+        self.channel.guild = self.guild
+        self.message = types.SimpleNamespace(attachments=[], reference=None)
+        self.replies: List[tuple] = []
+        self.files: List[bytes] = []
+
+    async def send(self, *args, **kwargs):
+        self.replies.append((args, kwargs))
+        if kwargs.get("file") is not None:
+            self.files.append(kwargs["file"].fp.read())
+        return types.SimpleNamespace(edit=self._edit)
+
+    async def _edit(self, **kwargs):
+        self.replies.append(((), kwargs))
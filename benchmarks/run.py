@@ -0,0 +1,465 @@
+"""
+Benchmarks hors ligne des chemins chauds du cog.
+
+Usage:
+    python benchmarks/run.py                          # tout, tailles 10k et 100k
+    python benchmarks/run.py --only micro
+    python benchmarks/run.py --sizes 10000,100000,1000000 --output new.json
+    python benchmarks/run.py --compare old.json --output new.json
+
+Les résultats sont écrits en JSON (stdout ou --output) pour comparer deux
+versions ; --compare affiche le ratio nouveau/ancien par benchmark.
+"""
+
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import (  # noqa: E402
+    COG_ROOT,
+    FakeAttachment,
+    FakeBot,
+    FakeConfig,
+    FakeContext,
+    FakeUploader,
+    load_cog_module,
+)
+
+import discord  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000]
+USERS_PER_CHANNEL = 100
+
+
+def _result(name: str, kind: str, ops: int, samples: List[float], **extra) -> Dict:
+    median = statistics.median(samples)
+    return {
+        "name": name,
+        "kind": kind,
+        "ops": ops,
+        "repeat": len(samples),
+        "median_s": median,
+        "mean_s": statistics.fmean(samples),
+        "min_s": min(samples),
+        "stdev_s": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "per_op_s": median / ops,
+        "ops_per_s": ops / median if median else float("inf"),
+        **extra,
+    }
+
+
+def bench_micro(name: str, func: Callable, number: int, repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append(time.perf_counter() - t0)
+    return _result(name, "micro", number, samples)
+
+
+def run_micro(repeat: int) -> List[Dict]:
+    reminders = load_cog_module("reminder_commands")
+    dice = load_cog_module("dice_commands")
+    seedream = load_cog_module("seedream_commands")
+    utils = load_cog_module("utils")
+    rate_limit = load_cog_module("rate_limit")
+
+    rc = reminders.ReminderCommands(FakeBot(), FakeConfig())
+    random.seed(0)
+
+    big_embed = discord.Embed(title="bench", color=0x4CAF50)
+    for i in range(100):
+        big_embed.add_field(name=f"champ {i}", value="valeur", inline=False)
+
+    bot = FakeBot()
+    limiter = rate_limit.RateLimiter(costs={"bench": 0.0001})
+    limited_ctx = FakeContext(bot, 1, 2, 3)
+
+    link = "https://discord.com/channels/123456789012345678/234567890123456789/345678901234567890"
+
+    cases = [
+        ("parse_duration[10m]", lambda: rc._parse_duration("10m"), 100_000),
+        ("parse_duration[1d3h15m]", lambda: rc._parse_duration("1d3h15m"), 100_000),
+        ("format_duration[93784]", lambda: rc._format_duration(93784), 100_000),
+        ("roll_dices[10]", lambda: dice.DiceCommands.roll_dices(10), 20_000),
+        ("roll_dices[100]", lambda: dice.DiceCommands.roll_dices(100), 2_000),
+        (
+            "clamp_ratio_size[800x600]",
+            lambda: seedream.SeedreamCommands._clamp_ratio_size(800, 600),
+            100_000,
+        ),
+        (
+            "clamp_ratio_size[5000x1200]",
+            lambda: seedream.SeedreamCommands._clamp_ratio_size(5000, 1200),
+            100_000,
+        ),
+        ("split_embed[100]", lambda: utils.split_embed(big_embed), 2_000),
+        ("parse_message_link", lambda: utils.parse_message_link(link), 100_000),
+        ("rate_limit_check", lambda: limiter.check(limited_ctx, "bench"), 100_000),
+    ]
+    return [bench_micro(name, func, number, repeat) for name, func, number in cases]
+
+
+def _make_reminder(i: int, timestamp: float, interval=None) -> Dict:
+    user_id = 10_000_000 + i
+    return {
+        "id": f"{user_id}_{i}",
+        "user_id": user_id,
+        "channel_id": 1_000 + i % USERS_PER_CHANNEL,
+        "guild_id": 42,
+        "message": f"rappel {i}",
+        "timestamp": timestamp,
+        "interval": interval,
+        "created_at": timestamp,
+    }
+
+
+def _populate(
+    config: FakeConfig,
+    n: int,
+    timestamp: float,
+    per_user: int = 1,
+    spread_guilds: bool = False,
+):
+    for i in range(n):
+        reminder = _make_reminder(i // per_user, timestamp)
+        reminder["id"] = f"{reminder['user_id']}_{i}"
+        if spread_guilds:
+            # 64 serveurs répartis sur les shards, 1 rappel sur 50 en MP.
+            reminder["guild_id"] = None if i % 50 == 0 else (i % 64 + 1) << 22
+        config.users.setdefault(reminder["user_id"], {"reminders": []})[
+            "reminders"
+        ].append(reminder)
+
+
+async def _drain(rc):
+    tasks = list(rc.active_tasks.values())
+    rc.stop()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def bench_create(n: int) -> Dict:
+    """`remind` de bout en bout : Config + planification + embed."""
+    reminders = load_cog_module("reminder_commands")
+    bot, config = FakeBot(), FakeConfig()
+    rc = reminders.ReminderCommands(bot, config)
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        ctx = FakeContext(bot, 10_000_000 + i, 1_000 + i % USERS_PER_CHANNEL, 42)
+        await rc.remind(ctx, "1h", message=f"rappel {i}")
+    elapsed = time.perf_counter() - t0
+
+    scheduled = len(rc.active_tasks)
+    await _drain(rc)
+    return _result(f"reminder_create[{n}]", "macro", n, [elapsed], scheduled=scheduled)
+
+
+async def bench_fire(n: int) -> Dict:
+    """Envoi + mise à jour Config de `n` rappels échus."""
+    reminders = load_cog_module("reminder_commands")
+    bot, config = FakeBot(), FakeConfig()
+    rc = reminders.ReminderCommands(bot, config)
+    _populate(config, n, time.time() - 1)
+
+    t0 = time.perf_counter()
+    for data in config.users.values():
+        for reminder in data["reminders"]:
+            rc._schedule_reminder(dict(reminder))
+    await asyncio.gather(*list(rc.active_tasks.values()))
+    elapsed = time.perf_counter() - t0
+
+    await _drain(rc)
+    return _result(f"reminder_fire[{n}]", "macro", n, [elapsed], sent=bot.sent)
+
+
+async def bench_cancel(n: int) -> Dict:
+    """`remind_cancel` sur `n` utilisateurs ayant chacun un rappel planifié."""
+    reminders = load_cog_module("reminder_commands")
+    bot, config = FakeBot(), FakeConfig()
+    rc = reminders.ReminderCommands(bot, config)
+    _populate(config, n, time.time() + 3600)
+    for data in config.users.values():
+        for reminder in data["reminders"]:
+            rc._schedule_reminder(dict(reminder))
+    contexts = [
+        FakeContext(bot, user_id, data["reminders"][0]["channel_id"], 42)
+        for user_id, data in config.users.items()
+    ]
+
+    t0 = time.perf_counter()
+    for ctx in contexts:
+        await rc.remind_cancel(ctx, 1)
+    elapsed = time.perf_counter() - t0
+
+    remaining = len(rc.active_tasks)
+    await _drain(rc)
+    return _result(f"reminder_cancel[{n}]", "macro", n, [elapsed], remaining=remaining)
+
+
+async def bench_restore(n: int) -> Dict:
+    """`_restore_reminders` sur `n` rappels futurs (10 par utilisateur)."""
+    reminders = load_cog_module("reminder_commands")
+    bot, config = FakeBot(), FakeConfig()
+    rc = reminders.ReminderCommands(bot, config)
+    _populate(config, n, time.time() + 3600, per_user=10)
+
+    t0 = time.perf_counter()
+    await rc._restore_reminders()
+    elapsed = time.perf_counter() - t0
+
+    scheduled = len(rc.active_tasks)
+    await _drain(rc)
+    return _result(f"reminder_restore[{n}]", "macro", n, [elapsed], scheduled=scheduled)
+
+
+async def bench_restore_sharded(n: int, shard_count: int = 4) -> Dict:
+    """
+    `shard_count` processus simulés restaurent depuis le même Config, puis le
+    processus du shard 1 s'arrête et le shard 0 reprend ses rappels.
+    """
+    reminders = load_cog_module("reminder_commands")
+    sharding = load_cog_module("sharding")
+    bot, config = FakeBot(), FakeConfig()
+    _populate(config, n, time.time() + 3600, per_user=10, spread_guilds=True)
+    processes = [
+        reminders.ReminderCommands(
+            bot, config, sharding.ShardOwnership([shard_id], shard_count)
+        )
+        for shard_id in range(shard_count)
+    ]
+
+    t0 = time.perf_counter()
+    for rc in processes:
+        await rc._restore_reminders()
+    elapsed = time.perf_counter() - t0
+
+    scheduled = [set(rc.active_tasks) for rc in processes]
+    covered = set().union(*scheduled)
+    duplicates = sum(len(ids) for ids in scheduled) - len(covered)
+
+    await _drain(processes[1])
+    t0 = time.perf_counter()
+    handed_off, _ = await processes[0].rebalance(
+        sharding.ShardOwnership([0, 1], shard_count)
+    )
+    handoff_s = time.perf_counter() - t0
+
+    for rc in processes:
+        await _drain(rc)
+    return _result(
+        f"reminder_restore_sharded[{n}]",
+        "macro",
+        n,
+        [elapsed],
+        shards=shard_count,
+        per_shard=[len(ids) for ids in scheduled],
+        missing=n - len(covered),
+        duplicates=duplicates,
+        handed_off=handed_off,
+        handoff_s=handoff_s,
+    )
+
+
+async def bench_export_import(n: int) -> Dict:
+    """`remind_export` de `n` rappels puis réimport par lots dans un Config vide."""
+    reminders = load_cog_module("reminder_commands")
+    bot, config = FakeBot(), FakeConfig()
+    source = reminders.ReminderCommands(bot, config)
+    _populate(config, n, time.time() + 3600, per_user=10)
+    ctx = FakeContext(bot, 1, 1_000, 42)
+    ctx.guild.filesize_limit = float("inf")
+
+    t0 = time.perf_counter()
+    await source.remind_export(ctx)
+    export_s = time.perf_counter() - t0
+
+    target = reminders.ReminderCommands(bot, FakeConfig())
+    stats = {
+        "imported": 0,
+        "duplicates": 0,
+        "expired": 0,
+        "scheduled": 0,
+        "pending": 0,
+    }
+    chunk = []
+    t0 = time.perf_counter()
+    for line in ctx.files[-1].splitlines():
+        chunk.append(target._validate_import(json.loads(line)))
+        if len(chunk) >= target.IMPORT_CHUNK_SIZE:
+            await target._import_chunk(chunk, stats)
+            chunk = []
+    if chunk:
+        await target._import_chunk(chunk, stats)
+    import_s = time.perf_counter() - t0
+
+    await _drain(target)
+    return _result(
+        f"reminder_export_import[{n}]",
+        "macro",
+        n,
+        [export_s + import_s],
+        export_s=export_s,
+        import_s=import_s,
+        **stats,
+    )
+
+
+async def bench_image_inputs(n: int, images: int = 10) -> Dict:
+    """
+    `n` éditions img2img réutilisant les mêmes `images` pièces jointes (dont
+    un doublon de contenu) : seul le premier passage télécharge et envoie.
+    """
+    uploads = load_cog_module("fal_uploads")
+    uploader = FakeUploader()
+    stage = uploads.ImageInputStage(uploader)
+    payloads = [bytes([i]) * 256 * 1024 for i in range(images - 1)]
+    attachments = [
+        FakeAttachment(i, data) for i, data in enumerate(payloads + payloads[:1])
+    ]
+
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await stage.prepare(None, attachments)
+    elapsed = time.perf_counter() - t0
+
+    return _result(
+        f"img2img_inputs[{n}]",
+        "macro",
+        n,
+        [elapsed],
+        downloads=stage.downloads,
+        uploads=len(uploader.uploaded),
+    )
+
+
+async def bench_message_links(n: int, distinct: int = 100) -> Dict:
+    """
+    `n` appels à `get_message_from_link` sur `distinct` messages : seul le
+    premier accès à chaque message doit coûter un appel REST.
+    """
+    utils = load_cog_module("utils")
+    bot = FakeBot()
+    ctx = FakeContext(bot, 1, 1_000, 42)
+    links = [
+        f"https://discord.com/channels/42/{1_000 + i % USERS_PER_CHANNEL}/{i}"
+        for i in range(distinct)
+    ]
+    for i in range(USERS_PER_CHANNEL):
+        bot.get_channel(1_000 + i).guild = ctx.guild
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        await utils.get_message_from_link(ctx, links[i % distinct])
+    elapsed = time.perf_counter() - t0
+
+    return _result(
+        f"message_links[{n}]", "macro", n, [elapsed], rest_calls=bot.fetches
+    )
+
+
+MACRO = [
+    bench_create,
+    bench_fire,
+    bench_cancel,
+    bench_restore,
+    bench_restore_sharded,
+    bench_export_import,
+    bench_image_inputs,
+    bench_message_links,
+]
+
+
+async def run_macro(sizes: List[int]) -> List[Dict]:
+    results = []
+    for n in sizes:
+        for bench in MACRO:
+            gc.collect()
+            results.append(await bench(n))
+    return results
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=COG_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnu"
+
+
+def _metadata() -> Dict:
+    return {
+        "revision": _git_revision(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "discord.py": discord.__version__,
+    }
+
+
+def _print_summary(results: List[Dict], baseline: Dict[str, Dict]):
+    for r in results:
+        line = (
+            f"{r['name']:<32} {r['per_op_s'] * 1e6:>12.2f} µs/op"
+            f" {r['ops_per_s']:>14,.0f} op/s"
+        )
+        old = baseline.get(r["name"])
+        if old:
+            line += f"   x{r['per_op_s'] / old['per_op_s']:.2f} vs base"
+        print(line, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", choices=["micro", "macro"])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, DEFAULT_SIZES)),
+        help="tailles des benchmarks de rappels, séparées par des virgules",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="fichier JSON (stdout par défaut)")
+    parser.add_argument("--compare", help="JSON de référence à comparer")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.only in (None, "micro"):
+        results += run_micro(args.repeat)
+    if args.only in (None, "macro"):
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+        results += asyncio.run(run_macro(sizes))
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {r["name"]: r for r in json.load(f)["results"]}
+    _print_summary(results, baseline)
+
+    report = json.dumps({"meta": _metadata(), "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Préparation des images d'entrée pour l'édition Seedream (img2img).
+Les pièces jointes sont téléchargées en parallèle, hachées, puis envoyées une
+seule fois sur le stockage FAL ; les URL obtenues sont réutilisées.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+log = logging.getLogger("red.red_owl_cog.seedream")
+
+FAL_STORAGE_INITIATE_URL = "https://rest.alpha.fal.ai/storage/upload/initiate"
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class FalStorageUploader:
+    """Envoie un fichier sur le stockage FAL et retourne son URL publique."""
+
+    def __init__(self, fal_key: str):
+        self.fal_key = fal_key
+
+    async def upload(self, session, data: bytes, content_type: str, filename: str):
+        headers = {"Authorization": f"Key {self.fal_key}"}
+        async with session.post(
+            FAL_STORAGE_INITIATE_URL,
+            headers=headers,
+            json={"content_type": content_type, "file_name": filename},
+            timeout=60,
+        ) as r:
+            if r.status // 100 != 2:
+                text = await r.text()
+                raise RuntimeError(f"Stockage FAL {r.status}: {text[:300]}")
+            target = await r.json()
+
+        async with session.put(
+            target["upload_url"],
+            data=data,
+            headers={"Content-Type": content_type},
+            timeout=120,
+        ) as r:
+            if r.status // 100 != 2:
+                raise RuntimeError(f"Envoi stockage FAL {r.status}")
+        return target["file_url"]
+
+
+class _TTLCache:
+    """Petit cache LRU à expiration."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[object, tuple]" = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+
+class ImageInputStage:
+    """
+    Transforme des pièces jointes en URL d'entrée pour FAL.
+    Cache pièce jointe -> hash (évite le téléchargement) et hash -> URL FAL
+    (évite l'envoi). En cas d'échec ou d'image trop lourde, l'URL du CDN
+    Discord est transmise telle quelle.
+    """
+
+    def __init__(
+        self,
+        uploader,
+        max_bytes: int = 20 * 1024 * 1024,
+        ttl: float = 3600.0,
+        max_entries: int = 256,
+        concurrency: int = 4,
+    ):
+        self.uploader = uploader
+        self.max_bytes = max_bytes
+        self.concurrency = concurrency
+        self._digests = _TTLCache(ttl, max_entries)
+        self._urls = _TTLCache(ttl, max_entries)
+        self._uploading: Dict[str, asyncio.Future] = {}
+        self.downloads = 0
+        self.uploads = 0
+
+    async def prepare(self, session, attachments) -> List[str]:
+        """Retourne les URL à passer à FAL, dans l'ordre des pièces jointes."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def prepare_one(att):
+            async with semaphore:
+                try:
+                    return await self._prepare_one(session, att)
+                except Exception as e:
+                    log.warning(f"Pré-envoi de {att.filename} impossible : {e}")
+                    return att.url
+
+        return list(await asyncio.gather(*(prepare_one(a) for a in attachments)))
+
+    async def _prepare_one(self, session, att) -> str:
+        digest: Optional[str] = self._digests.get(att.id)
+        if digest is not None:
+            url = self._urls.get(digest)
+            if url is not None:
+                return url
+
+        if att.size and att.size > self.max_bytes:
+            return att.url
+
+        data = await att.read()
+        self.downloads += 1
+        # Jusqu'à 20 Mo à hacher : hors de la boucle d'évènements.
+        digest = await asyncio.to_thread(_sha256, data)
+        self._digests.put(att.id, digest)
+
+        url = self._urls.get(digest)
+        if url is not None:
+            return url
+
+        # Un même contenu joint plusieurs fois n'est envoyé qu'une fois.
+        pending = self._uploading.get(digest)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._uploading[digest] = pending
+        try:
+            url = await self.uploader.upload(
+                session,
+                data,
+                att.content_type or "image/png",
+                att.filename or "image.png",
+            )
+            self.uploads += 1
+            self._urls.put(digest, url)
+            pending.set_result(url)
+            return url
+        except asyncio.CancelledError:
+            # Les autres commandes qui attendent ce contenu ne doivent pas être
+            # annulées : un échec ordinaire les renvoie vers l'URL du CDN.
+            pending.set_exception(RuntimeError("envoi annulé"))
+            pending.exception()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            # Évite « exception never retrieved » si personne n'attendait.
+            pending.exception()
+            raise
+        finally:
+            del self._uploading[digest]
@@ -0,0 +1,157 @@
+"""
+Surveillance de la latence de la boucle asyncio.
+
+Un battement dans la boucle mesure le retard de chaque réveil ; un thread
+échantillonne la pile du thread de la boucle pendant les blocages pour
+attribuer le retard à la commande, au listener ou à la tâche du cog qui
+s'exécutait.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+log = logging.getLogger("red.red_owl_cog.watchdog")
+
+WATCHDOG_FILE = os.path.abspath(__file__)
+COG_DIR = os.path.dirname(WATCHDOG_FILE)
+
+
+class LoopWatchdog:
+    """Journalise les blocages de boucle au-delà de `threshold` secondes."""
+
+    def __init__(
+        self,
+        threshold: float = 0.25,
+        interval: float = 0.05,
+        commands: Optional[Dict[str, str]] = None,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        # Nom de la fonction de rappel -> nom qualifié de la commande
+        self.commands = commands or {}
+        self.max_lag = 0.0
+        self.stalls = 0
+        # Libellé -> durée cumulée des blocages attribués (s)
+        self.blame: Counter = Counter()
+
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._samples: List[Tuple[str, str]] = []
+        self._samples_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Démarre la surveillance ; à appeler depuis la boucle surveillée."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._sampler, name="red-owl-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            beat = time.monotonic()
+            self._last_beat = beat
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - beat - self.interval
+
+            with self._samples_lock:
+                samples, self._samples = self._samples, []
+
+            if lag < self.threshold:
+                continue
+
+            self.stalls += 1
+            self.max_lag = max(self.max_lag, lag)
+            if not samples:
+                log.debug("Boucle bloquée %.0f ms (hors RedOwlCog)", lag * 1000)
+                continue
+
+            (label, location), hits = Counter(samples).most_common(1)[0]
+            self.blame[label] += lag
+            log.warning(
+                "Boucle bloquée %.0f ms par %s (%s, %d/%d échantillons)",
+                lag * 1000,
+                label,
+                location,
+                hits,
+                len(samples),
+            )
+
+    def _sampler(self):
+        while not self._stop.wait(self.interval):
+            stalled = time.monotonic() - self._last_beat - self.interval
+            if stalled < self.interval:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            culprit = self._attribute(frame)
+            del frame
+            if culprit is not None:
+                with self._samples_lock:
+                    self._samples.append(culprit)
+
+    def _attribute(self, frame) -> Optional[Tuple[str, str]]:
+        """
+        Cherche les frames du cog dans la pile : la plus externe donne la
+        commande, le listener ou la tâche, la plus interne l'emplacement du
+        blocage. Hors commandes connues, une méthode du cog (listener, hook,
+        cog_load...) est libellée par son nom.
+        """
+        innermost = outermost = None
+        while frame is not None:
+            code = frame.f_code
+            filename = code.co_filename
+            if filename.startswith(COG_DIR + os.sep) and filename != WATCHDOG_FILE:
+                if innermost is None:
+                    innermost = (filename, frame.f_lineno, code.co_name)
+                outermost = code
+            frame = frame.f_back
+
+        if outermost is None:
+            return None
+        name = outermost.co_name
+        if os.path.basename(outermost.co_filename) != "red_owl_cog.py":
+            label = f"tâche {name}"
+        elif name in self.commands:
+            label = f"commande {self.commands[name]}"
+        else:
+            label = f"RedOwlCog.{name}"
+        filename, lineno, name = innermost
+        return label, f"{os.path.basename(filename)}:{lineno} dans {name}"
+
+    def summary(self) -> str:
+        top = ", ".join(
+            f"{label} {total * 1000:.0f} ms"
+            for label, total in self.blame.most_common(5)
+        )
+        return (
+            f"seuil {self.threshold * 1000:.0f} ms — lag max "
+            f"{self.max_lag * 1000:.0f} ms, {self.stalls} blocage(s)"
+            + (f"\nPrincipaux responsables : {top}" if top else "")
+        )
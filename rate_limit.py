@@ -0,0 +1,205 @@
+"""
+Limitation de débit et délestage pour les commandes du cog.
+Token buckets par utilisateur, salon et serveur, coût par commande,
+plafond de commandes simultanées pour les plus coûteuses.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+log = logging.getLogger("red.red_owl_cog.ratelimit")
+
+
+class TokenBucket:
+    """Seau à jetons rechargé paresseusement à chaque accès."""
+
+    __slots__ = ("tokens", "updated", "notified_at")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+        self.notified_at = 0.0
+
+    def refill(self, capacity: float, rate: float, now: float):
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    Vérifie en O(1) si une commande peut s'exécuter.
+    Une commande consomme `cost` jetons dans chaque seau concerné (tous ou
+    aucun). Les seaux inactifs sont évincés au fil des accès.
+    """
+
+    # Portée -> (capacité, jetons rechargés par seconde)
+    DEFAULT_SCOPES: Dict[str, Tuple[float, float]] = {
+        "user": (10, 10 / 60),
+        "channel": (30, 0.5),
+        "guild": (60, 1.0),
+    }
+    DEFAULT_COSTS: Dict[str, float] = {
+        "hexa": 1,
+        "fate": 1,
+        "remind": 2,
+        "remind_repeat": 2,
+        "remind_list": 1,
+        "remind_cancel": 1,
+        "remind_clear": 2,
+        "gen": 5,
+        # Commandes propriétaire : non limitées.
+        "remind_export": 0,
+        "remind_import": 0,
+        "redowl": 0,
+    }
+    # Commandes simultanées au-delà desquelles on refuse au lieu d'empiler.
+    DEFAULT_MAX_CONCURRENCY: Dict[str, int] = {
+        "remind": 20,
+        "remind_repeat": 20,
+        "remind_cancel": 20,
+        "remind_clear": 20,
+        "gen": 3,
+    }
+
+    NOTIFY_COOLDOWN = 10.0
+    EVICT_PER_CALL = 4
+
+    def __init__(
+        self,
+        scopes: Optional[Dict[str, Tuple[float, float]]] = None,
+        costs: Optional[Dict[str, float]] = None,
+        max_concurrency: Optional[Dict[str, int]] = None,
+        max_buckets: int = 100_000,
+    ):
+        self.max_buckets = max_buckets
+        self.configure(scopes, costs, max_concurrency)
+        self.inflight: Dict[str, int] = {}
+        self._buckets: "OrderedDict[Tuple[str, int], TokenBucket]" = OrderedDict()
+
+    def configure(
+        self,
+        scopes: Optional[Dict[str, Tuple[float, float]]] = None,
+        costs: Optional[Dict[str, float]] = None,
+        max_concurrency: Optional[Dict[str, int]] = None,
+    ):
+        """
+        Applique des surcharges aux réglages par défaut (0 en concurrence =
+        illimité). Les seaux existants gardent leurs jetons.
+        """
+        self.scopes = {
+            **self.DEFAULT_SCOPES,
+            **{scope: tuple(value) for scope, value in (scopes or {}).items()},
+        }
+        self.costs = {**self.DEFAULT_COSTS, **(costs or {})}
+        self.max_concurrency = {
+            **self.DEFAULT_MAX_CONCURRENCY,
+            **(max_concurrency or {}),
+        }
+        # Un seau inactif plus longtemps que sa recharge complète est plein :
+        # le supprimer ne change rien au comportement.
+        self.idle_ttl = max(cap / rate for cap, rate in self.scopes.values())
+
+    def _cost(self, command: str) -> float:
+        """Coût du nom qualifié, sinon de la commande racine, sinon 1."""
+        cost = self.costs.get(command)
+        if cost is None:
+            cost = self.costs.get(command.split(" ", 1)[0], 1)
+        return cost
+
+    def _bucket(self, scope: str, key: int, now: float) -> TokenBucket:
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            bucket = TokenBucket(self.scopes[scope][0], now)
+            self._buckets[(scope, key)] = bucket
+        else:
+            self._buckets.move_to_end((scope, key))
+        return bucket
+
+    def _evict(self, now: float):
+        for _ in range(self.EVICT_PER_CALL):
+            if not self._buckets:
+                return
+            key, bucket = next(iter(self._buckets.items()))
+            if (
+                now - bucket.updated < self.idle_ttl
+                and len(self._buckets) <= self.max_buckets
+            ):
+                return
+            del self._buckets[key]
+
+    @staticmethod
+    def _keys(ctx):
+        keys = [("user", ctx.author.id), ("channel", ctx.channel.id)]
+        if ctx.guild is not None:
+            keys.append(("guild", ctx.guild.id))
+        return keys
+
+    def check(self, ctx, command: str) -> float:
+        """
+        Consomme les jetons de `command` pour ce contexte.
+        Retourne 0 si autorisé, sinon le délai (s) avant de réessayer.
+        """
+        cost = self._cost(command)
+        if cost <= 0:
+            return 0.0
+
+        now = time.monotonic()
+        self._evict(now)
+
+        buckets = []
+        retry_after = 0.0
+        for scope, key in self._keys(ctx):
+            capacity, rate = self.scopes[scope]
+            bucket = self._bucket(scope, key, now)
+            bucket.refill(capacity, rate, now)
+            needed = min(cost, capacity)
+            if bucket.tokens < needed:
+                retry_after = max(retry_after, (needed - bucket.tokens) / rate)
+            buckets.append((bucket, needed))
+
+        if retry_after > 0:
+            return retry_after
+
+        for bucket, needed in buckets:
+            bucket.tokens -= needed
+        return 0.0
+
+    def _should_notify(self, ctx) -> bool:
+        """Limite les réponses de refus pour ne pas amplifier un flood."""
+        now = time.monotonic()
+        bucket = self._bucket("user", ctx.author.id, now)
+        if now - bucket.notified_at < self.NOTIFY_COOLDOWN:
+            return False
+        bucket.notified_at = now
+        return True
+
+    def acquire(self, ctx, command: str) -> Optional[str]:
+        """
+        Réserve l'exécution de `command` (nom qualifié).
+        Retourne None si elle est autorisée, sinon le message de refus à
+        afficher (chaîne vide si l'utilisateur vient déjà d'être prévenu).
+        Toute réservation accordée doit être rendue par `release`.
+        """
+        limit = self.max_concurrency.get(command)
+        running = self.inflight.get(command, 0)
+
+        if limit and running >= limit:
+            if not self._should_notify(ctx):
+                return ""
+            log.warning("Délestage de %s (%d en cours)", command, running)
+            return "⏳ Trop de demandes en cours, réessayez dans un instant."
+
+        retry_after = self.check(ctx, command)
+        if retry_after > 0:
+            if not self._should_notify(ctx):
+                return ""
+            return f"⏳ Doucement ! Réessayez dans {math.ceil(retry_after)} s."
+
+        self.inflight[command] = running + 1
+        return None
+
+    def release(self, command: str):
+        self.inflight[command] -= 1
@@ -1,17 +1,163 @@
+import logging
+import os
+import time
+from typing import Optional
+
+import discord
 from redbot.core import Config, commands
 
-from .seedream_commands import SeedreamCommands
-from .dice_commands import DiceCommands
-from .reminder_commands import ReminderCommands
+from .rate_limit import RateLimiter
+from .sharding import ShardOwnership
+from .utils import MessageResolver
+
+log = logging.getLogger("red.red_owl_cog")
 
 
 class RedOwlCog(commands.Cog):
     def __init__(self, bot):
+        t0 = time.perf_counter()
         self.bot = bot
         self.config = Config.get_conf(self, identifier=260823057214)
-        self.dice_commands = DiceCommands()
-        self.seedream_commands = SeedreamCommands(bot)
-        self.reminder_commands = ReminderCommands(bot, self.config)
+        self.message_resolver = MessageResolver.for_bot(bot)
+        self.rate_limiter = RateLimiter()
+        self.config.register_global(
+            rate_limits={"scopes": {}, "costs": {}, "max_concurrency": {}}
+        )
+        self._dice_commands = None
+        self._seedream_commands = None
+        self._reminder_commands = None
+        self._watchdog = None
+        self._load_timings = {"init": time.perf_counter() - t0}
+
+    async def cog_load(self):
+        t0 = time.perf_counter()
+        self._apply_rate_limits(await self.config.rate_limits())
+        # Les rappels doivent être replanifiés au démarrage ; la restauration
+        # tourne en tâche de fond pour ne pas retarder le chargement.
+        self.reminder_commands.start()
+        # RED_OWL_WATCHDOG=<seuil en ms> active la surveillance dès le chargement.
+        threshold_ms = os.environ.get("RED_OWL_WATCHDOG")
+        if threshold_ms:
+            try:
+                self._start_watchdog(int(threshold_ms))
+            except ValueError:
+                log.warning("RED_OWL_WATCHDOG invalide : %r", threshold_ms)
+        self._load_timings["cog_load"] = time.perf_counter() - t0
+        log.info(
+            "RedOwlCog chargé en %.1f ms (%s)",
+            (self._load_timings["init"] + self._load_timings["cog_load"]) * 1000,
+            ", ".join(f"{k}: {v * 1000:.1f} ms" for k, v in self._load_timings.items()),
+        )
+
+    def cog_unload(self):
+        if self._reminder_commands is not None:
+            self._reminder_commands.stop()
+        if self._watchdog is not None:
+            self._watchdog.stop()
+
+    def _apply_rate_limits(self, limits: dict):
+        self.rate_limiter.configure(
+            limits["scopes"], limits["costs"], limits["max_concurrency"]
+        )
+
+    async def cog_before_invoke(self, ctx):
+        """Limitation de débit commune à toutes les commandes du cog."""
+        name = ctx.command.qualified_name
+        refusal = self.rate_limiter.acquire(ctx, name)
+        if refusal is not None:
+            # Red affiche le message ; vide = refus silencieux.
+            raise commands.UserFeedbackCheckFailure(refusal or None)
+        ctx._red_owl_rate_slot = name
+
+    async def cog_after_invoke(self, ctx):
+        self._release_rate_slot(ctx)
+
+    @commands.Cog.listener()
+    async def on_command_error(self, ctx, error, *args):
+        # En slash, les hooks « after » ne sont pas appelés si la commande
+        # échoue : on rend la réservation ici (sans effet si déjà rendue).
+        if ctx.cog is self:
+            self._release_rate_slot(ctx)
+
+    # Le cache local du résolveur ne doit pas resservir un message supprimé
+    # ou modifié.
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        self.message_resolver.invalidate(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        for message_id in payload.message_ids:
+            self.message_resolver.invalidate(message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        self.message_resolver.invalidate(payload.message_id)
+
+    def _release_rate_slot(self, ctx):
+        name = getattr(ctx, "_red_owl_rate_slot", None)
+        if name is not None:
+            ctx._red_owl_rate_slot = None
+            self.rate_limiter.release(name)
+
+    def _start_watchdog(self, threshold_ms: int):
+        from .loop_watchdog import LoopWatchdog
+
+        if self._watchdog is not None:
+            self._watchdog.stop()
+        # Permet de distinguer les commandes des listeners dans les blocages.
+        command_callbacks = {
+            command.callback.__name__: command.qualified_name
+            for command in self.walk_commands()
+        }
+        self._watchdog = LoopWatchdog(
+            threshold=max(threshold_ms, 50) / 1000, commands=command_callbacks
+        )
+        self._watchdog.start()
+
+    def _timed_init(self, name: str, factory):
+        t0 = time.perf_counter()
+        subsystem = factory()
+        elapsed = time.perf_counter() - t0
+        self._load_timings[name] = elapsed
+        log.debug("Sous-système %s initialisé en %.1f ms", name, elapsed * 1000)
+        return subsystem
+
+    @property
+    def dice_commands(self):
+        if self._dice_commands is None:
+
+            def factory():
+                from .dice_commands import DiceCommands
+
+                return DiceCommands()
+
+            self._dice_commands = self._timed_init("dice", factory)
+        return self._dice_commands
+
+    @property
+    def seedream_commands(self):
+        if self._seedream_commands is None:
+
+            def factory():
+                from .seedream_commands import SeedreamCommands
+
+                return SeedreamCommands(self.bot)
+
+            self._seedream_commands = self._timed_init("seedream", factory)
+        return self._seedream_commands
+
+    @property
+    def reminder_commands(self):
+        if self._reminder_commands is None:
+
+            def factory():
+                from .reminder_commands import ReminderCommands
+
+                return ReminderCommands(self.bot, self.config)
+
+            self._reminder_commands = self._timed_init("reminders", factory)
+        return self._reminder_commands
 
     @commands.hybrid_command(aliases=["h"])
     async def hexa(self, ctx, num_dice: int, extra_success: int = 0):
@@ -50,6 +196,144 @@ class RedOwlCog(commands.Cog):
         """Supprime tous vos rappels."""
         await self.reminder_commands.remind_clear(ctx)
 
+    @commands.is_owner()
+    @commands.hybrid_command()
+    async def remind_export(self, ctx, *, filters: str = ""):
+        """Exporte les rappels en JSONL (filtres: guild=<id> user=<id> channel=<id>)."""
+        await self.reminder_commands.remind_export(ctx, filters)
+
+    @commands.is_owner()
+    @commands.hybrid_command()
+    async def remind_import(self, ctx, fichier: discord.Attachment):
+        """Importe des rappels depuis un fichier JSONL (format de remind_export)."""
+        await self.reminder_commands.remind_import(ctx, fichier)
+
+    @commands.is_owner()
+    @commands.group(name="redowl")
+    async def redowl(self, ctx):
+        """Réglages de RedOwlCog (propriétaire)."""
+
+    @redowl.group(name="ratelimit", invoke_without_command=True)
+    async def redowl_ratelimit(self, ctx):
+        """Affiche les limites de débit en vigueur."""
+        limiter = self.rate_limiter
+        scopes = "\n".join(
+            f"• {scope} : {capacity:g} jetons, +{rate:g}/s"
+            for scope, (capacity, rate) in limiter.scopes.items()
+        )
+        costs = ", ".join(f"{name} {cost:g}" for name, cost in limiter.costs.items())
+        concurrency = ", ".join(
+            f"{name} {limit}"
+            for name, limit in limiter.max_concurrency.items()
+            if limit
+        )
+        await ctx.send(
+            f"**Seaux**\n{scopes}\n**Coûts** : {costs}\n"
+            f"**Simultanées max** : {concurrency or 'aucune limite'}"
+        )
+
+    def _command_names(self) -> set:
+        return {command.qualified_name for command in self.walk_commands()}
+
+    @redowl_ratelimit.command(name="cost")
+    async def redowl_ratelimit_cost(self, ctx, command: str, cost: float):
+        """Coût d'une commande en jetons (0 = non limitée)."""
+        if command not in self._command_names() or cost < 0:
+            await ctx.send("❌ Commande inconnue ou coût négatif.")
+            return
+        async with self.config.rate_limits() as limits:
+            limits["costs"][command] = cost
+            self._apply_rate_limits(limits)
+        await ctx.send(f"✅ Coût de `{command}` : {cost:g} jeton(s).")
+
+    @redowl_ratelimit.command(name="concurrency")
+    async def redowl_ratelimit_concurrency(self, ctx, command: str, limit: int):
+        """Nombre maximal d'exécutions simultanées (0 = illimité)."""
+        if command not in self._command_names() or limit < 0:
+            await ctx.send("❌ Commande inconnue ou limite négative.")
+            return
+        async with self.config.rate_limits() as limits:
+            limits["max_concurrency"][command] = limit
+            self._apply_rate_limits(limits)
+        await ctx.send(f"✅ `{command}` : {limit or 'illimité'} en simultané.")
+
+    @redowl_ratelimit.command(name="scope")
+    async def redowl_ratelimit_scope(
+        self, ctx, scope: str, capacity: float, per_second: float
+    ):
+        """Taille et recharge d'un seau (user, channel ou guild)."""
+        if scope not in RateLimiter.DEFAULT_SCOPES or capacity <= 0 or per_second <= 0:
+            await ctx.send("❌ Portée : user, channel ou guild ; valeurs > 0.")
+            return
+        async with self.config.rate_limits() as limits:
+            limits["scopes"][scope] = [capacity, per_second]
+            self._apply_rate_limits(limits)
+        await ctx.send(f"✅ Seau {scope} : {capacity:g} jetons, +{per_second:g}/s.")
+
+    @redowl_ratelimit.command(name="reset")
+    async def redowl_ratelimit_reset(self, ctx):
+        """Revient aux limites par défaut."""
+        await self.config.rate_limits.clear()
+        self._apply_rate_limits(await self.config.rate_limits())
+        await ctx.send("✅ Limites de débit réinitialisées.")
+
+    @redowl.group(name="shards", invoke_without_command=True)
+    async def redowl_shards(self, ctx):
+        """Affiche les shards dont ce processus planifie les rappels."""
+        reminders = self.reminder_commands
+        ownership = reminders.ownership or ShardOwnership.from_bot(self.bot)
+        await ctx.send(
+            f"Shards {sorted(ownership.shard_ids)} sur {ownership.shard_count} — "
+            f"{len(reminders.active_tasks)} rappel(s) planifié(s)."
+        )
+
+    async def _rebalance(self, ctx, ownership: Optional[ShardOwnership]):
+        claimed, released = await self.reminder_commands.rebalance(ownership)
+        await ctx.send(
+            f"✅ Shards {sorted(self.reminder_commands.ownership.shard_ids)} : "
+            f"{claimed} rappel(s) pris en charge, {released} cédé(s)."
+        )
+
+    @redowl_shards.command(name="sync")
+    async def redowl_shards_sync(self, ctx):
+        """Planifie les rappels de ces shards ajoutés ailleurs (import...)."""
+        await self._rebalance(ctx, self.reminder_commands.ownership)
+
+    @redowl_shards.command(name="take")
+    async def redowl_shards_take(self, ctx, *shard_ids: int):
+        """Fixe les shards gérés ici (reprise des rappels d'un processus arrêté)."""
+        shard_count = ShardOwnership.from_bot(self.bot).shard_count
+        if not shard_ids or any(not 0 <= i < shard_count for i in shard_ids):
+            await ctx.send(f"❌ Indiquez des shards entre 0 et {shard_count - 1}.")
+            return
+        await self._rebalance(ctx, ShardOwnership(shard_ids, shard_count))
+
+    @redowl_shards.command(name="reset")
+    async def redowl_shards_reset(self, ctx):
+        """Revient aux shards réellement connectés par ce processus."""
+        await self._rebalance(ctx, ShardOwnership.from_bot(self.bot))
+
+    @redowl.command(name="watchdog")
+    async def redowl_watchdog(
+        self, ctx, action: str = "status", threshold_ms: int = 250
+    ):
+        """Surveille la latence de la boucle (on [seuil_ms] / off / status)."""
+        action = action.lower()
+        if action == "on":
+            self._start_watchdog(threshold_ms)
+            await ctx.send(f"🩺 Watchdog activé ({self._watchdog.summary()}).")
+        elif action == "off":
+            if self._watchdog is not None:
+                self._watchdog.stop()
+                self._watchdog = None
+            await ctx.send("🩺 Watchdog désactivé.")
+        elif self._watchdog is not None and self._watchdog.running:
+            await ctx.send(f"🩺 Watchdog actif : {self._watchdog.summary()}")
+        else:
+            await ctx.send(
+                "🩺 Watchdog inactif. Utilisez `redowl watchdog on [seuil_ms]`."
+            )
+
     @commands.hybrid_command(name="gen")
     async def gen(self, ctx, *, query: str):
         """
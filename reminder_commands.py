@@ -4,60 +4,153 @@ Supporte les rappels uniques et récurrents avec persistance.
 """
 
 import asyncio
+import json
 import logging
+import math
 import re
+import tempfile
+import time
 from datetime import datetime
 from typing import Optional, Dict
+import aiohttp
 import discord
 from redbot.core import Config, commands
 
+from .sharding import ShardOwnership
+
 log = logging.getLogger("red.red_owl_cog.reminders")
 
 
 class ReminderCommands:
     """Gère tous les rappels avec persistance et fonctionnalités avancées."""
 
-    def __init__(self, bot, config: Config):
+    EXPORT_FILTERS = {"guild": "guild_id", "user": "user_id", "channel": "channel_id"}
+    IMPORT_CHUNK_SIZE = 500
+
+    def __init__(
+        self, bot, config: Config, ownership: Optional[ShardOwnership] = None
+    ):
         self.bot = bot
         self.config = config
+        # None : lu sur le bot (shard_ids/shard_count) au premier besoin.
+        self.ownership = ownership
         self.active_tasks: Dict[str, asyncio.Task] = {}
+        self._restore_task: Optional[asyncio.Task] = None
 
         default_user = {"reminders": []}
         self.config.register_user(**default_user)
 
-        self.bot.loop.create_task(self._restore_reminders())
+    def start(self):
+        """Lance la restauration des rappels en tâche de fond."""
+        if self._restore_task is None or self._restore_task.done():
+            self._restore_task = asyncio.create_task(self._restore_reminders())
+            self._restore_task.add_done_callback(self._on_restore_done)
+
+    def stop(self):
+        """Annule la restauration en cours et tous les rappels planifiés."""
+        if self._restore_task is not None and not self._restore_task.done():
+            self._restore_task.cancel()
+        self._restore_task = None
+
+        for task in self.active_tasks.values():
+            task.cancel()
+        self.active_tasks.clear()
+
+    @staticmethod
+    def _on_restore_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Erreur restauration rappels", exc_info=task.exception())
+
+    def _owns(self, reminder: dict) -> bool:
+        if self.ownership is None:
+            self.ownership = ShardOwnership.from_bot(self.bot)
+        return self.ownership.owns(reminder)
 
     async def _restore_reminders(self):
-        """Restaure tous les rappels actifs après un redémarrage."""
+        """Restaure les rappels des shards de ce processus après un redémarrage."""
         await self.bot.wait_until_ready()
 
+        t0 = time.perf_counter()
+        restored_count, _ = await self._claim_reminders()
+
+        if restored_count > 0:
+            log.info(
+                f"{restored_count} rappel(s) restauré(s) en "
+                f"{(time.perf_counter() - t0) * 1000:.1f} ms"
+            )
+
+    async def rebalance(self, ownership: Optional[ShardOwnership] = None):
+        """
+        Applique une nouvelle répartition des shards : planifie les rappels
+        nouvellement possédés et annule ceux passés à un autre processus.
+        """
+        previous = self.ownership
+        self.ownership = ownership or ShardOwnership.from_bot(self.bot)
+        claimed, released = await self._claim_reminders()
+        log.info(
+            f"Shards {previous} -> {self.ownership} : {claimed} rappel(s) "
+            f"pris en charge, {released} cédé(s)"
+        )
+        return claimed, released
+
+    async def _claim_reminders(self):
+        """
+        Planifie les rappels possédés qui ne le sont pas encore et libère les
+        autres. Seuls les rappels possédés sont réécrits dans Config.
+        Retourne (rappels planifiés, rappels cédés).
+        """
         all_users = await self.config.all_users()
         now = datetime.now().timestamp()
-        restored_count = 0
+        claimed_count = 0
+        released_count = 0
 
         for user_id, user_data in all_users.items():
-            reminders = user_data.get("reminders", [])
-            valid_reminders = []
+            claimed = []
+            for reminder in user_data.get("reminders", []):
+                if not self._owns(reminder):
+                    task = self.active_tasks.pop(reminder["id"], None)
+                    if task is not None:
+                        task.cancel()
+                        released_count += 1
+                elif reminder["id"] not in self.active_tasks:
+                    claimed.append(reminder)
+
+            if not claimed:
+                continue
 
-            for reminder in reminders:
-                if reminder["timestamp"] <= now:
-                    if now - reminder["timestamp"] < 300:
-                        await self._send_reminder(reminder)
-
-                    if reminder.get("interval"):
-                        reminder["timestamp"] = now + reminder["interval"]
-                        valid_reminders.append(reminder)
-                        self._schedule_reminder(reminder)
-                        restored_count += 1
-                else:
+            valid_reminders = []
+            for reminder in claimed:
+                if await self._catch_up(reminder, now):
                     valid_reminders.append(reminder)
                     self._schedule_reminder(reminder)
-                    restored_count += 1
+                    claimed_count += 1
+
+            # Fusion avec l'état courant : les rappels des autres shards et
+            # ceux créés entre-temps sont conservés tels quels.
+            processed = {r["id"] for r in claimed}
+            async with self.config.user_from_id(user_id).reminders() as reminders:
+                reminders[:] = [
+                    r for r in reminders if r["id"] not in processed
+                ] + valid_reminders
 
-            await self.config.user_from_id(user_id).reminders.set(valid_reminders)
+        return claimed_count, released_count
 
-        if restored_count > 0:
-            log.info(f"{restored_count} rappel(s) restauré(s)")
+    async def _catch_up(self, reminder: dict, now: float) -> bool:
+        """
+        Rattrape un rappel échu : envoi s'il a moins de 5 minutes de retard,
+        décalage au prochain intervalle s'il est récurrent.
+        Retourne False si le rappel doit être supprimé.
+        """
+        if reminder["timestamp"] > now:
+            return True
+
+        if now - reminder["timestamp"] < 300:
+            await self._send_reminder(reminder)
+
+        if reminder.get("interval"):
+            reminder["timestamp"] = now + reminder["interval"]
+            return True
+        return False
 
     def _parse_duration(self, duration_str: str) -> Optional[int]:
         """
@@ -138,14 +231,42 @@ class ReminderCommands:
         """Schedule l'envoi d'un rappel."""
         reminder_id = reminder["id"]
 
+        def release():
+            # Libère l'entrée avant une éventuelle replanification, pour ne
+            # pas annuler la tâche courante ni perdre la suivante.
+            if self.active_tasks.get(reminder_id) is asyncio.current_task():
+                del self.active_tasks[reminder_id]
+
         async def reminder_task():
             now = datetime.now().timestamp()
             wait_time = max(0, reminder["timestamp"] - now)
 
             await asyncio.sleep(wait_time)
-            await self._send_reminder(reminder)
+            if not self._owns(reminder):
+                # Shard passé à un autre processus entre-temps.
+                release()
+                return
 
+            # Config fait foi : le rappel a pu être annulé depuis un autre
+            # processus, ou envoyé et replanifié s'il est récurrent.
             user_id = reminder["user_id"]
+            stored = next(
+                (
+                    r
+                    for r in await self.config.user_from_id(user_id).reminders()
+                    if r["id"] == reminder_id
+                ),
+                None,
+            )
+            if stored is None or stored["timestamp"] != reminder["timestamp"]:
+                release()
+                if stored is not None:
+                    self._schedule_reminder(stored)
+                return
+
+            await self._send_reminder(stored)
+            release()
+
             async with self.config.user_from_id(user_id).reminders() as reminders:
                 for i, r in enumerate(reminders):
                     if r["id"] == reminder_id:
@@ -158,9 +279,6 @@ class ReminderCommands:
                             reminders.pop(i)
                         break
 
-            if reminder_id in self.active_tasks:
-                del self.active_tasks[reminder_id]
-
         if reminder_id in self.active_tasks:
             self.active_tasks[reminder_id].cancel()
 
@@ -360,3 +478,257 @@ class ReminderCommands:
         await self.config.user(ctx.author).reminders.set([])
 
         await ctx.send(f"✅ **{count}** rappel(s) supprimé(s).")
+
+    def _parse_export_filters(self, text: str) -> Dict[str, int]:
+        """Parse `guild=<id> user=<id> channel=<id>` (ou `clé:<id>`)."""
+        criteria = {}
+        for token in text.split():
+            key, sep, value = token.partition("=")
+            if not sep:
+                key, sep, value = token.partition(":")
+            field = self.EXPORT_FILTERS.get(key.lower())
+            if not sep or field is None or not value.isdigit():
+                raise ValueError(
+                    f"Filtre invalide `{token}`. Utilisez guild=<id>, user=<id>, channel=<id>."
+                )
+            criteria[field] = int(value)
+        return criteria
+
+    async def _iter_reminders(self, criteria: Dict[str, int]):
+        """Parcourt les rappels stockés correspondant aux critères."""
+        if "user_id" in criteria:
+            user_ids = [criteria["user_id"]]
+            all_users = None
+        else:
+            all_users = await self.config.all_users()
+            user_ids = list(all_users)
+
+        for user_id in user_ids:
+            if all_users is None:
+                reminders = await self.config.user_from_id(user_id).reminders()
+            else:
+                # Libère chaque utilisateur une fois parcouru.
+                reminders = all_users.pop(user_id).get("reminders", [])
+            for reminder in reminders:
+                if all(reminder.get(k) == v for k, v in criteria.items()):
+                    yield reminder
+
+    async def remind_export(self, ctx: commands.Context, filters: str = ""):
+        """
+        Exporte les rappels en JSONL, un rappel par ligne, en plusieurs
+        fichiers `reminders-N.jsonl` au-delà de la limite d'envoi du serveur.
+
+        Exemples:
+        - !remind_export
+        - !remind_export guild=123456789012345678
+        - !remind_export user=123 channel=456
+        """
+        try:
+            criteria = self._parse_export_filters(filters)
+        except ValueError as e:
+            await ctx.send(f"❌ {e}")
+            return
+
+        # Marge pour l'enveloppe multipart de l'envoi.
+        limit = getattr(ctx.guild, "filesize_limit", 10 * 1024 * 1024) - 4096
+        count = 0
+        parts = 0
+        # Écrit au fil de l'eau ; chaque fichier bascule sur disque au-delà de
+        # 1 Mo et est envoyé dès qu'il atteindrait la limite d'envoi.
+        fp = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        try:
+            async for reminder in self._iter_reminders(criteria):
+                line = json.dumps(reminder, ensure_ascii=False).encode("utf-8")
+                if fp.tell() and fp.tell() + len(line) + 1 > limit:
+                    parts += 1
+                    await self._send_export_part(
+                        ctx, fp, f"📦 Partie {parts}…", f"reminders-{parts}.jsonl"
+                    )
+                    fp = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+                fp.write(line)
+                fp.write(b"\n")
+                count += 1
+                if count % 1000 == 0:
+                    await asyncio.sleep(0)
+
+            if count == 0:
+                await ctx.send("📭 Aucun rappel à exporter.")
+            elif parts == 0:
+                await self._send_export_part(
+                    ctx,
+                    fp,
+                    f"📦 **{count}** rappel(s) exporté(s).",
+                    "reminders.jsonl",
+                )
+            else:
+                parts += 1
+                await self._send_export_part(
+                    ctx,
+                    fp,
+                    f"📦 **{count}** rappel(s) exporté(s) en {parts} fichiers.",
+                    f"reminders-{parts}.jsonl",
+                )
+        finally:
+            fp.close()
+
+    @staticmethod
+    async def _send_export_part(ctx, fp, content: str, filename: str):
+        fp.seek(0)
+        await ctx.send(content, file=discord.File(fp, filename=filename))
+        fp.close()
+
+    @staticmethod
+    def _validate_import(data) -> dict:
+        """Valide et normalise une ligne importée ; lève ValueError sinon."""
+
+        def is_int(value):
+            return isinstance(value, int) and not isinstance(value, bool)
+
+        def is_number(value):
+            return (is_int(value) or isinstance(value, float)) and math.isfinite(value)
+
+        if not isinstance(data, dict):
+            raise ValueError("objet JSON attendu")
+        if not isinstance(data.get("id"), str) or not 0 < len(data["id"]) <= 100:
+            raise ValueError("`id` invalide")
+        for key in ("user_id", "channel_id"):
+            if not is_int(data.get(key)) or data[key] <= 0:
+                raise ValueError(f"`{key}` invalide")
+        if data.get("guild_id") is not None and not is_int(data["guild_id"]):
+            raise ValueError("`guild_id` invalide")
+        if not isinstance(data.get("message"), str):
+            raise ValueError("`message` invalide")
+        if not is_number(data.get("timestamp")):
+            raise ValueError("`timestamp` invalide")
+        interval = data.get("interval")
+        if interval is not None and (
+            not is_int(interval) or not 60 <= interval <= 2592000
+        ):
+            raise ValueError("`interval` invalide")
+        created_at = data.get("created_at")
+
+        return {
+            "id": data["id"],
+            "user_id": data["user_id"],
+            "channel_id": data["channel_id"],
+            "guild_id": data.get("guild_id"),
+            "message": data["message"][:1000],
+            "timestamp": data["timestamp"],
+            "interval": interval,
+            "created_at": (
+                created_at if is_number(created_at) else datetime.now().timestamp()
+            ),
+        }
+
+    async def _import_chunk(self, chunk: list, stats: Dict[str, int]):
+        """Écrit un lot de rappels (un accès Config par utilisateur) et planifie."""
+        by_user: Dict[int, list] = {}
+        for reminder in chunk:
+            by_user.setdefault(reminder["user_id"], []).append(reminder)
+
+        now = datetime.now().timestamp()
+        for user_id, incoming in by_user.items():
+            to_schedule = []
+            async with self.config.user_from_id(user_id).reminders() as reminders:
+                existing = {r["id"] for r in reminders}
+                for reminder in incoming:
+                    if reminder["id"] in existing:
+                        stats["duplicates"] += 1
+                        continue
+                    existing.add(reminder["id"])
+                    if self._owns(reminder):
+                        if not await self._catch_up(reminder, now):
+                            stats["expired"] += 1
+                            continue
+                        to_schedule.append(reminder)
+                    else:
+                        stats["pending"] += 1
+                    reminders.append(reminder)
+                    stats["imported"] += 1
+
+            for reminder in to_schedule:
+                self._schedule_reminder(reminder)
+            stats["scheduled"] += len(to_schedule)
+
+    async def remind_import(
+        self, ctx: commands.Context, attachment: discord.Attachment
+    ):
+        """
+        Importe des rappels depuis un fichier JSONL (format de !remind_export).
+        Les `id` déjà présents sont ignorés ; les rappels des shards de ce
+        processus sont planifiés immédiatement, les autres attendent leur
+        processus (redémarrage ou `redowl shards sync`).
+        """
+        stats = {
+            "imported": 0,
+            "duplicates": 0,
+            "expired": 0,
+            "scheduled": 0,
+            "pending": 0,
+        }
+        invalid = []
+        invalid_count = 0
+        chunk = []
+        line_no = 0
+
+        error = None
+
+        wait_msg = await ctx.send("📥 Import en cours…")
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(attachment.url, timeout=300) as resp:
+                    if resp.status // 100 != 2:
+                        await wait_msg.edit(
+                            content=f"❌ Téléchargement impossible ({resp.status})."
+                        )
+                        return
+                    # Lecture ligne à ligne : mémoire bornée par la taille d'un lot.
+                    while True:
+                        try:
+                            raw = await resp.content.readline()
+                        except ValueError:
+                            # Ligne plus longue que le tampon d'aiohttp.
+                            error = f"ligne {line_no + 1} trop longue"
+                            break
+                        if not raw:
+                            break
+                        line_no += 1
+                        line = raw.strip()
+                        if not line:
+                            continue
+                        try:
+                            chunk.append(self._validate_import(json.loads(line)))
+                        except ValueError as e:
+                            invalid_count += 1
+                            if len(invalid) < 5:
+                                invalid.append(f"ligne {line_no} : {e}")
+                            continue
+                        if len(chunk) >= self.IMPORT_CHUNK_SIZE:
+                            await self._import_chunk(chunk, stats)
+                            chunk = []
+        except aiohttp.ClientError as e:
+            error = f"erreur réseau : {e}"
+        except asyncio.TimeoutError:
+            error = "délai de téléchargement dépassé"
+
+        # Les lignes déjà validées sont importées même si la lecture a échoué.
+        if chunk:
+            await self._import_chunk(chunk, stats)
+
+        report = (
+            f"✅ **{stats['imported']}** rappel(s) importé(s), "
+            f"**{stats['scheduled']}** planifié(s) sur ce processus.\n"
+            f"Doublons ignorés : {stats['duplicates']} · Expirés : {stats['expired']}"
+            f" · Invalides : {invalid_count}"
+        )
+        if error is not None:
+            report = f"⚠️ **Import interrompu** ({error}).\n" + report
+        if stats["pending"]:
+            report += (
+                f"\n⏸️ **{stats['pending']}** rappel(s) d'autres shards en "
+                "attente : planifiés au redémarrage de leur processus ou via "
+                "`redowl shards sync` sur celui-ci."
+            )
+        if invalid:
+            report += "\n" + "\n".join(f"• {e}" for e in invalid)
+        await wait_msg.edit(content=report)
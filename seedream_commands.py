@@ -18,9 +18,21 @@ class SeedreamCommands:
 
     DEFAULT_SIZE = 2048
 
-    def __init__(self, bot):
+    def __init__(self, bot, uploader=None):
         self.bot = bot
         self.fal_key = os.environ.get("FAL_KEY")
+        self._uploader = uploader
+        self._input_stage = None
+
+    @property
+    def input_stage(self):
+        """Étape de pré-envoi des images d'entrée, créée au premier edit."""
+        if self._input_stage is None:
+            from .fal_uploads import FalStorageUploader, ImageInputStage
+
+            uploader = self._uploader or FalStorageUploader(self.fal_key)
+            self._input_stage = ImageInputStage(uploader)
+        return self._input_stage
 
     @staticmethod
     def _is_image_attachment(att: discord.Attachment) -> bool:
@@ -138,8 +150,8 @@ class SeedreamCommands:
             return
 
         atts = [a for a in ctx.message.attachments if self._is_image_attachment(a)]
-        image_urls = [a.url for a in atts][:10]
-        is_edit = len(image_urls) > 0
+        atts = atts[:10]
+        is_edit = len(atts) > 0
 
         try:
             if width is not None and height is not None:
@@ -171,8 +183,6 @@ class SeedreamCommands:
         }
 
         url = FAL_EDIT_URL if is_edit else FAL_T2I_URL
-        if is_edit:
-            base_payload["image_urls"] = image_urls
 
         action_text = "édition" if is_edit else "génération"
         wait_msg = await ctx.send(f"🧪 Seedream v4 — {action_text} en cours…")
@@ -184,6 +194,13 @@ class SeedreamCommands:
 
         try:
             async with aiohttp.ClientSession() as session:
+                if is_edit:
+                    # Images envoyées une fois sur le stockage FAL puis
+                    # réutilisées, au lieu de laisser FAL lire le CDN Discord.
+                    base_payload["image_urls"] = await self.input_stage.prepare(
+                        session, atts
+                    )
+
                 async with session.post(
                     url, headers=headers, json=base_payload, timeout=300
                 ) as resp:
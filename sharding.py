@@ -0,0 +1,49 @@
+"""
+Répartition des rappels entre shards pour les déploiements multi-processus.
+
+Règle d'appartenance :
+- rappel de serveur : shard `(guild_id >> 22) % shard_count` (celui qui
+  reçoit les évènements de ce serveur) ;
+- rappel en MP (`guild_id` None) : shard 0, qui reçoit les MP.
+"""
+
+from typing import Iterable, Optional
+
+
+class ShardOwnership:
+    """Ensemble des shards gérés par ce processus."""
+
+    def __init__(self, shard_ids: Optional[Iterable[int]] = None, shard_count: int = 1):
+        self.shard_count = max(1, int(shard_count))
+        if shard_ids is None:
+            shard_ids = range(self.shard_count)
+        self.shard_ids = frozenset(shard_ids)
+
+    @classmethod
+    def from_bot(cls, bot) -> "ShardOwnership":
+        """Lit `shard_ids`/`shard_count` du bot (tous les shards si absents)."""
+        shard_count = getattr(bot, "shard_count", None) or 1
+        return cls(getattr(bot, "shard_ids", None), shard_count)
+
+    @staticmethod
+    def shard_for(guild_id: Optional[int], shard_count: int) -> int:
+        if guild_id is None:
+            return 0
+        return (guild_id >> 22) % shard_count
+
+    def owns(self, reminder: dict) -> bool:
+        return (
+            self.shard_for(reminder.get("guild_id"), self.shard_count)
+            in self.shard_ids
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, ShardOwnership):
+            return NotImplemented
+        return (self.shard_ids, self.shard_count) == (
+            other.shard_ids,
+            other.shard_count,
+        )
+
+    def __repr__(self):
+        return f"ShardOwnership({sorted(self.shard_ids)}, {self.shard_count})"
@@ -0,0 +1,9 @@
+"""
+Les tests importent les modules du cog sans exécuter le `__init__` du paquet
+et réutilisent les substituts hors ligne de `benchmarks/fakes.py`.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
@@ -0,0 +1,75 @@
+import asyncio
+
+from fakes import FakeAttachment, FakeUploader, load_cog_module
+
+fal_uploads = load_cog_module("fal_uploads")
+
+
+class FailingUploader:
+    async def upload(self, session, data, content_type, filename):
+        raise RuntimeError("Stockage FAL 503")
+
+
+def test_repeated_edit_skips_download_and_upload():
+    uploader = FakeUploader()
+    stage = fal_uploads.ImageInputStage(uploader)
+    att = FakeAttachment(1, b"image")
+
+    async def scenario():
+        first = await stage.prepare(None, [att])
+        second = await stage.prepare(None, [att])
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == ["https://fal.invalid/files/1/ref.png"]
+    assert att.reads == stage.downloads == 1
+    assert uploader.uploaded == [5]
+
+
+def test_upload_failure_falls_back_to_cdn_url():
+    stage = fal_uploads.ImageInputStage(FailingUploader())
+    att = FakeAttachment(1, b"image")
+
+    urls = asyncio.run(stage.prepare(None, [att]))
+    assert urls == [att.url]
+    assert stage.uploads == 0
+
+
+def test_identical_content_is_uploaded_once():
+    uploader = FakeUploader()
+    stage = fal_uploads.ImageInputStage(uploader)
+    atts = [FakeAttachment(i, b"meme image") for i in range(3)]
+
+    urls = asyncio.run(stage.prepare(None, atts))
+    assert len(set(urls)) == 1
+    assert stage.downloads == 3
+    assert stage.uploads == len(uploader.uploaded) == 1
+
+
+class BlockingUploader:
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def upload(self, session, data, content_type, filename):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+def test_cancelled_upload_falls_back_for_concurrent_waiters():
+    uploader = BlockingUploader()
+    stage = fal_uploads.ImageInputStage(uploader)
+    first, second = FakeAttachment(1, b"image"), FakeAttachment(2, b"image")
+
+    async def scenario():
+        owner = asyncio.create_task(stage.prepare(None, [first]))
+        await uploader.started.wait()
+        waiter = asyncio.create_task(stage.prepare(None, [second]))
+        while not stage._digests.get(second.id):
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0)
+        owner.cancel()
+        return owner, await waiter
+
+    owner, urls = asyncio.run(scenario())
+    assert owner.cancelled()
+    assert urls == [second.url]
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import threading
+import time
+import types
+
+from fakes import load_cog_module
+
+loop_watchdog = load_cog_module("loop_watchdog")
+
+
+def _stack(*calls):
+    """Pile factice, du plus externe au plus interne : (fichier, fonction)."""
+    frame = None
+    for filename, name in calls:
+        code = types.SimpleNamespace(
+            co_filename=os.path.join(loop_watchdog.COG_DIR, filename), co_name=name
+        )
+        frame = types.SimpleNamespace(f_code=code, f_lineno=1, f_back=frame)
+    return frame
+
+
+def test_attribute_distinguishes_commands_from_listeners_and_tasks():
+    watchdog = loop_watchdog.LoopWatchdog(commands={"gen": "gen"})
+
+    label, location = watchdog._attribute(
+        _stack(("red_owl_cog.py", "gen"), ("seedream_commands.py", "gen"))
+    )
+    assert label == "commande gen"
+    assert location == "seedream_commands.py:1 dans gen"
+
+    label, _ = watchdog._attribute(_stack(("red_owl_cog.py", "cog_load")))
+    assert label == "RedOwlCog.cog_load"
+
+    label, _ = watchdog._attribute(_stack(("reminder_commands.py", "reminder_task")))
+    assert label == "tâche reminder_task"
+
+
+def test_heartbeat_detects_and_attributes_real_stall():
+    red_owl_cog = load_cog_module("red_owl_cog")
+
+    class BlockingDice:
+        async def hexa(self, ctx, num_dice, extra_success):
+            time.sleep(0.2)
+
+    cog = red_owl_cog.RedOwlCog.__new__(red_owl_cog.RedOwlCog)
+    cog._dice_commands = BlockingDice()
+    watchdog = loop_watchdog.LoopWatchdog(threshold=0.05, commands={"hexa": "hexa"})
+
+    async def scenario():
+        watchdog.start()
+        await asyncio.sleep(0.1)
+        # Tâche à part : seule la commande est sur la pile pendant le blocage.
+        await asyncio.create_task(cog.hexa.callback(cog, None, 1))
+        await asyncio.sleep(0.1)
+        watchdog.stop()
+
+    # Boucle dans un thread dédié, pour que le test lui-même ne soit pas
+    # sur la pile échantillonnée.
+    thread = threading.Thread(target=asyncio.run, args=(scenario(),))
+    thread.start()
+    thread.join(timeout=5)
+
+    assert watchdog.stalls >= 1
+    assert watchdog.max_lag >= 0.1
+    assert watchdog.blame["commande hexa"] >= 0.1
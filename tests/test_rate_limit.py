@@ -0,0 +1,91 @@
+import asyncio
+import types
+
+import pytest
+from redbot.core import commands
+
+from fakes import FakeBot, FakeContext, load_cog_module
+
+rate_limit = load_cog_module("rate_limit")
+red_owl_cog = load_cog_module("red_owl_cog")
+
+
+def _ctx(user_id=1, channel_id=2, guild_id=3, command="remind"):
+    ctx = FakeContext(FakeBot(), user_id, channel_id, guild_id)
+    ctx.command = types.SimpleNamespace(qualified_name=command)
+    return ctx
+
+
+def test_tokens_are_spent_all_or_nothing():
+    limiter = rate_limit.RateLimiter(
+        scopes={"user": (4, 0.001), "channel": (100, 1), "guild": (100, 1)}
+    )
+    ctx = _ctx()
+    assert limiter.check(ctx, "remind") == 0
+    assert limiter.check(ctx, "remind") == 0
+    assert limiter.check(ctx, "remind") > 0
+    # Le refus n'a rien consommé dans les seaux salon et serveur.
+    assert limiter._buckets[("channel", 2)].tokens == pytest.approx(96, abs=0.1)
+
+
+def test_subcommands_fall_back_to_root_cost():
+    limiter = rate_limit.RateLimiter()
+    assert limiter._cost("redowl ratelimit cost") == 0
+    assert limiter._cost("gen") == 5
+    assert limiter._cost("inconnue") == 1
+
+
+def test_acquire_sheds_load_and_notifies_once():
+    limiter = rate_limit.RateLimiter(max_concurrency={"gen": 1}, costs={"gen": 0})
+    ctx = _ctx(command="gen")
+    assert limiter.acquire(ctx, "gen") is None
+    assert limiter.acquire(ctx, "gen").startswith("⏳")
+    assert limiter.acquire(ctx, "gen") == ""
+    limiter.release("gen")
+    assert limiter.inflight["gen"] == 0
+
+
+def _cog(limiter):
+    cog = red_owl_cog.RedOwlCog.__new__(red_owl_cog.RedOwlCog)
+    cog.rate_limiter = limiter
+    return cog
+
+
+def test_cog_hooks_reserve_and_release_once():
+    limiter = rate_limit.RateLimiter(max_concurrency={"gen": 1}, costs={"gen": 0})
+    cog = _cog(limiter)
+    ctx = _ctx(command="gen")
+    ctx.cog = cog
+
+    async def scenario():
+        await cog.cog_before_invoke(ctx)
+        assert limiter.inflight["gen"] == 1
+
+        other = _ctx(user_id=9, command="gen")
+        with pytest.raises(commands.UserFeedbackCheckFailure):
+            await cog.cog_before_invoke(other)
+
+        # Échec en slash : seul le listener d'erreur rend la réservation,
+        # et un second appel (hook « after » en préfixe) est sans effet.
+        await cog.on_command_error(ctx, RuntimeError())
+        await cog.cog_after_invoke(ctx)
+
+    asyncio.run(scenario())
+    assert limiter.inflight["gen"] == 0
+
+
+def test_configure_overrides_defaults_from_config():
+    limiter = rate_limit.RateLimiter()
+    # Les listes viennent de Config (JSON) : les portées redeviennent des tuples.
+    limiter.configure(
+        scopes={"user": [2, 1]}, costs={"hexa": 3}, max_concurrency={"gen": 0}
+    )
+    assert limiter.scopes["user"] == (2, 1)
+    assert limiter.scopes["guild"] == rate_limit.RateLimiter.DEFAULT_SCOPES["guild"]
+    assert limiter._cost("hexa") == 3
+    assert limiter._cost("gen") == 5
+
+    ctx = _ctx(command="gen")
+    limiter.costs["gen"] = 0
+    for _ in range(5):
+        assert limiter.acquire(ctx, "gen") is None
@@ -0,0 +1,366 @@
+import asyncio
+import json
+import time
+import types
+
+import pytest
+
+from fakes import FakeBot, FakeConfig, FakeContext, load_cog_module
+
+reminder_commands = load_cog_module("reminder_commands")
+sharding = load_cog_module("sharding")
+
+
+def _reminder(reminder_id, delay, interval=None):
+    return {
+        "id": reminder_id,
+        "user_id": 1,
+        "channel_id": 2,
+        "guild_id": None,
+        "message": "test",
+        "timestamp": time.time() + delay,
+        "interval": interval,
+        "created_at": time.time(),
+    }
+
+
+def test_task_skips_reminder_cancelled_by_another_process():
+    async def scenario():
+        bot, config = FakeBot(), FakeConfig()
+        rc = reminder_commands.ReminderCommands(
+            bot, config, sharding.ShardOwnership([0], 1)
+        )
+        reminder = _reminder("a", 0.01)
+        await config.user_from_id(1).reminders.set([reminder])
+        rc._schedule_reminder(dict(reminder))
+
+        # Annulation depuis un autre processus : seul Config est modifié.
+        await config.user_from_id(1).reminders.set([])
+        await asyncio.sleep(0.05)
+        return bot.sent, rc.active_tasks
+
+    sent, active = asyncio.run(scenario())
+    assert sent == 0
+    assert not active
+
+
+def test_task_follows_rescheduled_recurring_reminder():
+    async def scenario():
+        bot, config = FakeBot(), FakeConfig()
+        rc = reminder_commands.ReminderCommands(
+            bot, config, sharding.ShardOwnership([0], 1)
+        )
+        reminder = _reminder("r", 0.01, interval=3600)
+        moved = dict(reminder, timestamp=reminder["timestamp"] + 3600)
+        await config.user_from_id(1).reminders.set([moved])
+        rc._schedule_reminder(dict(reminder))
+
+        await asyncio.sleep(0.05)
+        sent, scheduled = bot.sent, "r" in rc.active_tasks
+        rc.stop()
+        return sent, scheduled
+
+    sent, scheduled = asyncio.run(scenario())
+    assert sent == 0
+    assert scheduled
+
+
+def test_import_reports_reminders_of_other_shards_as_pending():
+    async def scenario():
+        bot, config = FakeBot(), FakeConfig()
+        rc = reminder_commands.ReminderCommands(
+            bot, config, sharding.ShardOwnership([0], 2)
+        )
+        own = dict(_reminder("own", 3600), guild_id=0)
+        other = dict(_reminder("other", 3600), guild_id=1 << 22)
+        stats = dict.fromkeys(
+            ("imported", "duplicates", "expired", "scheduled", "pending"), 0
+        )
+        await rc._import_chunk([own, other], stats)
+        stored = await config.user_from_id(1).reminders()
+        scheduled = set(rc.active_tasks)
+        rc.stop()
+        return stats, stored, scheduled
+
+    stats, stored, scheduled = asyncio.run(scenario())
+    assert stats["imported"] == 2
+    assert stats["scheduled"] == 1
+    assert stats["pending"] == 1
+    assert {r["id"] for r in stored} == {"own", "other"}
+    assert scheduled == {"own"}
+
+
+def _stats():
+    return dict.fromkeys(
+        ("imported", "duplicates", "expired", "scheduled", "pending"), 0
+    )
+
+
+def test_parse_export_filters():
+    rc = reminder_commands.ReminderCommands(FakeBot(), FakeConfig())
+    assert rc._parse_export_filters("") == {}
+    assert rc._parse_export_filters("guild=1 User:2 channel=3") == {
+        "guild_id": 1,
+        "user_id": 2,
+        "channel_id": 3,
+    }
+    for bad in ("guild", "guild=abc", "serveur=1", "user=-2"):
+        with pytest.raises(ValueError):
+            rc._parse_export_filters(bad)
+
+
+def test_iter_reminders_applies_filters():
+    async def scenario():
+        config = FakeConfig()
+        rc = reminder_commands.ReminderCommands(FakeBot(), config)
+        await config.user_from_id(1).reminders.set(
+            [
+                dict(_reminder("a", 60), guild_id=10, channel_id=100),
+                dict(_reminder("b", 60), guild_id=20, channel_id=200),
+            ]
+        )
+        await config.user_from_id(2).reminders.set(
+            [dict(_reminder("c", 60), user_id=2, guild_id=10, channel_id=101)]
+        )
+
+        async def ids(criteria):
+            return sorted([r["id"] async for r in rc._iter_reminders(criteria)])
+
+        return (
+            await ids({}),
+            await ids({"guild_id": 10}),
+            await ids({"user_id": 1}),
+            await ids({"channel_id": 200}),
+            await ids({"guild_id": 10, "user_id": 2}),
+        )
+
+    assert asyncio.run(scenario()) == (
+        ["a", "b", "c"],
+        ["a", "c"],
+        ["a", "b"],
+        ["b"],
+        ["c"],
+    )
+
+
+def test_validate_import_rejects_bad_fields():
+    valid = _reminder("a", 60, interval=3600)
+    assert reminder_commands.ReminderCommands._validate_import(valid) == valid
+    for bad in (
+        [],
+        dict(valid, id=""),
+        dict(valid, user_id=True),
+        dict(valid, channel_id=0),
+        dict(valid, guild_id="1"),
+        dict(valid, message=None),
+        dict(valid, timestamp=float("nan")),
+        dict(valid, interval=30),
+        dict(valid, interval=2592001),
+    ):
+        with pytest.raises(ValueError):
+            reminder_commands.ReminderCommands._validate_import(bad)
+
+
+def test_import_chunk_dedupes_by_id_within_and_across_chunks():
+    async def scenario():
+        config = FakeConfig()
+        rc = reminder_commands.ReminderCommands(
+            FakeBot(), config, sharding.ShardOwnership([0], 1)
+        )
+        await config.user_from_id(1).reminders.set([_reminder("old", 3600)])
+        stats = _stats()
+        await rc._import_chunk(
+            [_reminder("old", 3600), _reminder("a", 3600), _reminder("a", 3600)],
+            stats,
+        )
+        await rc._import_chunk([_reminder("a", 3600), _reminder("b", 3600)], stats)
+        stored = await config.user_from_id(1).reminders()
+        rc.stop()
+        return stats, [r["id"] for r in stored]
+
+    stats, stored = asyncio.run(scenario())
+    assert stored == ["old", "a", "b"]
+    assert stats["imported"] == 2
+    assert stats["duplicates"] == 3
+
+
+def test_export_import_round_trip_splits_large_exports():
+    async def scenario():
+        bot, config = FakeBot(), FakeConfig()
+        source = reminder_commands.ReminderCommands(bot, config)
+        reminders = [
+            dict(_reminder(f"r{i}", 3600), user_id=1 + i % 3) for i in range(40)
+        ]
+        for user_id in (1, 2, 3):
+            await config.user_from_id(user_id).reminders.set(
+                [r for r in reminders if r["user_id"] == user_id]
+            )
+        ctx = FakeContext(bot, 1, 2, 5)
+        # Limite d'envoi réduite : l'export doit être découpé.
+        ctx.guild.filesize_limit = 4096 + 2000
+        await source.remind_export(ctx)
+
+        target = reminder_commands.ReminderCommands(
+            bot, FakeConfig(), sharding.ShardOwnership([0], 1)
+        )
+        stats = _stats()
+        lines = [line for data in ctx.files for line in data.splitlines()]
+        chunk = [target._validate_import(json.loads(line)) for line in lines]
+        await target._import_chunk(chunk, stats)
+        imported = await target.config.all_users()
+        target.stop()
+        filenames = [kwargs["file"].filename for _, kwargs in ctx.replies]
+        return reminders, imported, stats, filenames, ctx.files
+
+    reminders, imported, stats, filenames, files = asyncio.run(scenario())
+    assert len(files) > 1
+    assert all(len(data) <= 2000 for data in files)
+    assert filenames == [f"reminders-{i}.jsonl" for i in range(1, len(files) + 1)]
+    assert stats["imported"] == stats["scheduled"] == 40
+    restored = [r for data in imported.values() for r in data["reminders"]]
+    assert sorted(restored, key=lambda r: r["id"]) == sorted(
+        reminders, key=lambda r: r["id"]
+    )
+
+
+class _TimeoutContent:
+    def __init__(self, lines):
+        self._lines = list(lines)
+
+    async def readline(self):
+        if not self._lines:
+            raise asyncio.TimeoutError()
+        return self._lines.pop(0)
+
+
+class _FakeSession:
+    """Téléchargement qui expire après les lignes fournies."""
+
+    status = 200
+
+    def __init__(self, lines):
+        self.content = _TimeoutContent(lines)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, url, **kwargs):
+        return self
+
+
+
+def test_import_timeout_keeps_validated_lines(monkeypatch):
+    import aiohttp
+
+    line = json.dumps(_reminder("a", 3600)).encode() + b"\n"
+    monkeypatch.setattr(aiohttp, "ClientSession", lambda: _FakeSession([line]))
+
+    async def scenario():
+        bot, config = FakeBot(), FakeConfig()
+        rc = reminder_commands.ReminderCommands(
+            bot, config, sharding.ShardOwnership([0], 1)
+        )
+        ctx = FakeContext(bot, 1, 2)
+        await rc.remind_import(ctx, types.SimpleNamespace(url="https://cdn.invalid"))
+        stored = await config.user_from_id(1).reminders()
+        rc.stop()
+        return ctx.replies[-1][1]["content"], stored
+
+    report, stored = asyncio.run(scenario())
+    assert report.startswith("⚠️ **Import interrompu** (délai")
+    assert [r["id"] for r in stored] == ["a"]
+
+
+def test_shards_share_one_store_without_gaps_or_duplicates():
+    shard_count = 4
+
+    async def scenario():
+        bot, config = FakeBot(), FakeConfig()
+        reminders = [
+            dict(_reminder(f"g{i}", 3600), user_id=1 + i % 5, guild_id=i << 22)
+            for i in range(24)
+        ] + [dict(_reminder(f"dm{i}", 3600), user_id=1 + i) for i in range(3)]
+        processes = [
+            reminder_commands.ReminderCommands(
+                bot, config, sharding.ShardOwnership([shard_id], shard_count)
+            )
+            for shard_id in range(shard_count)
+        ]
+        for user_id in range(1, 6):
+            await config.user_from_id(user_id).reminders.set(
+                [r for r in reminders if r["user_id"] == user_id]
+            )
+        for rc in processes:
+            await rc._restore_reminders()
+        scheduled = [set(rc.active_tasks) for rc in processes]
+
+        # Le processus du shard 1 s'arrête ; celui du shard 0 reprend ses
+        # rappels, puis les cède au shard 2.
+        processes[1].stop()
+        taken = await processes[0].rebalance(
+            sharding.ShardOwnership([0, 1], shard_count)
+        )
+        after_take = set(processes[0].active_tasks)
+        given = await processes[0].rebalance(
+            sharding.ShardOwnership([0], shard_count)
+        )
+        after_give = set(processes[0].active_tasks)
+        stored = await config.all_users()
+        for rc in processes:
+            rc.stop()
+        return reminders, scheduled, taken, after_take, given, after_give, stored
+
+    reminders, scheduled, taken, after_take, given, after_give, stored = (
+        asyncio.run(scenario())
+    )
+    everything = {r["id"] for r in reminders}
+    assert sum(len(ids) for ids in scheduled) == len(everything)
+    assert set().union(*scheduled) == everything
+    assert {f"dm{i}" for i in range(3)} <= scheduled[0]
+    assert all(
+        (int(rid[1:]) % shard_count) == shard_id
+        for shard_id, ids in enumerate(scheduled)
+        for rid in ids
+        if rid.startswith("g")
+    )
+
+    assert taken == (len(scheduled[1]), 0)
+    assert after_take == scheduled[0] | scheduled[1]
+    assert given == (0, len(scheduled[1]))
+    assert after_give == scheduled[0]
+    # Les rappels cédés restent dans Config pour leur nouveau propriétaire.
+    assert {r["id"] for u in stored.values() for r in u["reminders"]} == everything
+
+
+def test_cog_unload_cancels_restore_and_scheduled_reminders():
+    red_owl_cog = load_cog_module("red_owl_cog")
+
+    async def scenario():
+        bot = FakeBot()
+        ready = asyncio.Event()
+        bot.wait_until_ready = ready.wait
+        rc = reminder_commands.ReminderCommands(
+            bot, FakeConfig(), sharding.ShardOwnership([0], 1)
+        )
+        cog = red_owl_cog.RedOwlCog.__new__(red_owl_cog.RedOwlCog)
+        cog._reminder_commands = rc
+        cog._watchdog = None
+
+        rc.start()
+        restore = rc._restore_task
+        for i in range(3):
+            rc._schedule_reminder(_reminder(f"r{i}", 3600))
+        tasks = list(rc.active_tasks.values())
+        await asyncio.sleep(0)
+
+        cog.cog_unload()
+        await asyncio.sleep(0)
+        return restore, tasks, rc
+
+    restore, tasks, rc = asyncio.run(scenario())
+    assert restore.cancelled()
+    assert all(task.cancelled() for task in tasks)
+    assert rc.active_tasks == {} and rc._restore_task is None
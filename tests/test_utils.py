@@ -0,0 +1,131 @@
+import asyncio
+import types
+
+from fakes import FakeBot, FakeContext, load_cog_module
+
+utils = load_cog_module("utils")
+
+
+def _setup():
+    bot = FakeBot()
+    ctx = FakeContext(bot, 1, 10, 42)
+    return bot, ctx
+
+
+def test_parse_message_link_forms():
+    assert utils.parse_message_link("https://discord.com/channels/1/2/3") == (1, 2, 3)
+    assert utils.parse_message_link(
+        "<https://canary.discordapp.com/channels/@me/2/3/>"
+    ) == (None, 2, 3)
+    assert utils.parse_message_link("2-3") == (None, 2, 3)
+    assert utils.parse_message_link("https://example.com/channels/1/2/3") is None
+
+
+def test_get_message_from_link_reuses_shared_cache():
+    bot, ctx = _setup()
+    link = "https://discord.com/channels/42/10/99"
+
+    async def scenario():
+        first = await utils.get_message_from_link(ctx, link)
+        second = await utils.get_message_from_link(ctx, link)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert first.id == 99
+    assert bot.fetches == 1
+    assert utils.MessageResolver.for_bot(bot) is utils.MessageResolver.for_bot(bot)
+
+
+def test_get_message_from_link_reports_errors():
+    bot, ctx = _setup()
+
+    async def scenario():
+        bad = await utils.get_message_from_link(ctx, "pas un lien")
+        other_guild = await utils.get_message_from_link(
+            ctx, "https://discord.com/channels/7/10/99"
+        )
+        return bad, other_guild
+
+    assert asyncio.run(scenario()) == (None, None)
+    assert [args[0] for args, _ in ctx.replies] == [
+        "Lien de message invalide.",
+        "Canal introuvable.",
+    ]
+    assert bot.fetches == 0
+
+
+def test_get_message_from_link_requires_read_access():
+    bot, ctx = _setup()
+    link = "https://discord.com/channels/7/70/99"
+    other = bot.get_guild(7)
+    bot.get_channel(70).guild = other
+
+    async def scenario():
+        other.member_ids = {2}
+        not_member = await utils.get_message_from_link(ctx, link)
+        other.member_ids = None
+        bot.get_channel(70).hidden_from.add(ctx.author.id)
+        no_history = await utils.get_message_from_link(ctx, link)
+        bot.get_channel(70).hidden_from.clear()
+        allowed = await utils.get_message_from_link(ctx, link)
+        # Le message est en cache : l'accès est tout de même revérifié.
+        other.member_ids = {2}
+        cached = await utils.get_message_from_link(ctx, link)
+        internal = await utils.MessageResolver.for_bot(bot).resolve(link)
+        return not_member, no_history, allowed, cached, internal
+
+    not_member, no_history, allowed, cached, internal = asyncio.run(scenario())
+    assert not_member is None and no_history is None and cached is None
+    assert allowed.id == internal.id == 99
+    assert [args[0] for args, _ in ctx.replies] == ["Canal introuvable."] * 3
+    assert bot.fetches == 1
+
+
+def test_resolve_many_dedupes_and_bounds_concurrency():
+    bot, ctx = _setup()
+    resolver = utils.MessageResolver(bot)
+    channel = bot.get_channel(10)
+    running = peak = 0
+    fetch = channel.fetch_message
+
+    async def tracked_fetch(message_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001)
+        running -= 1
+        return await fetch(message_id)
+
+    channel.fetch_message = tracked_fetch
+    links = [f"https://discord.com/channels/42/10/{i}" for i in range(20)]
+
+    results = asyncio.run(
+        resolver.resolve_many(links + links[:5] + ["invalide"], concurrency=3)
+    )
+    assert [m.id for m in results[:25]] == list(range(20)) + list(range(5))
+    assert results[-1] is None
+    assert bot.fetches == 20
+    assert peak <= 3
+
+
+def test_cog_listeners_invalidate_resolver_cache():
+    bot, ctx = _setup()
+    red_owl_cog = load_cog_module("red_owl_cog")
+    cog = red_owl_cog.RedOwlCog.__new__(red_owl_cog.RedOwlCog)
+    cog.message_resolver = utils.MessageResolver.for_bot(bot)
+    link = "https://discord.com/channels/42/10/99"
+
+    async def scenario():
+        await utils.get_message_from_link(ctx, link)
+        await cog.on_raw_message_edit(types.SimpleNamespace(message_id=99))
+        await utils.get_message_from_link(ctx, link)
+        await cog.on_raw_message_delete(types.SimpleNamespace(message_id=99))
+        await utils.get_message_from_link(ctx, link)
+        await cog.on_raw_bulk_message_delete(
+            types.SimpleNamespace(message_ids={99})
+        )
+        await utils.get_message_from_link(ctx, link)
+
+    asyncio.run(scenario())
+    assert bot.fetches == 4
@@ -1,5 +1,23 @@
+import asyncio
+import re
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
 import discord
 
+MESSAGE_LINK_RE = re.compile(
+    r"^<?https?://(?:(?:ptb|canary|www)\.)?discord(?:app)?\.com"
+    r"/channels/(?P<guild_id>\d+|@me)/(?P<channel_id>\d+)/(?P<message_id>\d+)/?>?$"
+)
+# Format "Copier l'ID" (maj+clic) : <channel_id>-<message_id>
+MESSAGE_ID_PAIR_RE = re.compile(r"^(?P<channel_id>\d+)-(?P<message_id>\d+)$")
+
+
+class MessageLinkError(Exception):
+    """Lien de message non résolu ; le texte est destiné à l'utilisateur."""
+
 
 def split_embed(embed):
     """Divise un embed en plusieurs si >25 champs."""
@@ -14,21 +32,188 @@ def split_embed(embed):
     return embeds
 
 
-async def get_message_from_link(ctx, link):
-    """Récupère un message à partir d'un lien."""
-    try:
-        message_id = int(link.split("/")[-1])
-        channel_id = int(link.split("/")[-2])
-        guild = ctx.guild
-        channel = guild.get_channel(channel_id)
-        if channel:
-            try:
-                message = await channel.fetch_message(message_id)
+def parse_message_link(link: str) -> Optional[Tuple[Optional[int], int, int]]:
+    """
+    Découpe un lien de message Discord (stable, ptb, canary, discordapp, MP)
+    ou une paire d'IDs `canal-message`.
+    Retourne (guild_id ou None si inconnu/MP, channel_id, message_id) ou None.
+    """
+    link = link.strip()
+    match = MESSAGE_LINK_RE.match(link)
+    if not match:
+        pair = MESSAGE_ID_PAIR_RE.match(link)
+        if not pair:
+            return None
+        return None, int(pair.group("channel_id")), int(pair.group("message_id"))
+    guild_id = match.group("guild_id")
+    return (
+        None if guild_id == "@me" else int(guild_id),
+        int(match.group("channel_id")),
+        int(match.group("message_id")),
+    )
+
+
+_shared_resolvers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+class MessageResolver:
+    """
+    Résout des liens de message en limitant les appels REST.
+    Ordre : cache de messages de la connexion, cache TTL/LRU local, puis
+    `fetch_message`. Gère les fils et les autres serveurs visibles par le bot.
+    """
+
+    def __init__(self, bot, ttl: float = 300.0, max_size: int = 512):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache: "OrderedDict[int, Tuple[float, discord.Message]]" = OrderedDict()
+
+    @classmethod
+    def for_bot(cls, bot) -> "MessageResolver":
+        """Résolveur partagé par bot, pour que tous les appelants profitent du cache."""
+        resolver = _shared_resolvers.get(bot)
+        if resolver is None:
+            resolver = _shared_resolvers[bot] = cls(bot)
+        return resolver
+
+    def _cache_get(self, message_id: int) -> Optional[discord.Message]:
+        entry = self._cache.get(message_id)
+        if entry is None:
+            return None
+        expires_at, message = entry
+        if expires_at < time.monotonic():
+            del self._cache[message_id]
+            return None
+        self._cache.move_to_end(message_id)
+        return message
+
+    def _cache_put(self, message: discord.Message):
+        self._cache[message.id] = (time.monotonic() + self.ttl, message)
+        self._cache.move_to_end(message.id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, message_id: int):
+        """Retire un message du cache local (ex: après suppression)."""
+        self._cache.pop(message_id, None)
+
+    def _get_cached_message(self, message_id: int) -> Optional[discord.Message]:
+        state = getattr(self.bot, "_connection", None)
+        if state is not None:
+            message = state._get_message(message_id)
+            if message is not None:
                 return message
-            except discord.NotFound:
-                await ctx.send("Message introuvable.")
+        return self._cache_get(message_id)
+
+    async def _resolve_channel(self, guild_id: Optional[int], channel_id: int):
+        if guild_id is not None:
+            guild = self.bot.get_guild(guild_id)
+            if guild is None:
+                raise MessageLinkError("Serveur introuvable.")
+            channel = guild.get_channel_or_thread(channel_id)
         else:
-            await ctx.send("Canal introuvable.")
-    except (IndexError, ValueError):
-        await ctx.send("Lien de message invalide.")
+            channel = self.bot.get_channel(channel_id)
+
+        if channel is None:
+            # Fils archivés et MP non mis en cache : un seul appel REST.
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except (discord.NotFound, discord.Forbidden, discord.InvalidData):
+                raise MessageLinkError("Canal introuvable.")
+
+        channel_guild = getattr(channel, "guild", None)
+        if guild_id is not None and getattr(channel_guild, "id", None) != guild_id:
+            raise MessageLinkError("Canal introuvable.")
+        return channel
+
+    @staticmethod
+    def _check_access(channel, author):
+        """
+        Vérifie que `author` peut lire l'historique de `channel` : membre du
+        serveur avec la permission, ou destinataire du MP.
+        """
+        guild = getattr(channel, "guild", None)
+        if guild is None:
+            recipient = getattr(channel, "recipient", None)
+            allowed = recipient is not None and recipient.id == author.id
+        else:
+            member = guild.get_member(author.id)
+            allowed = (
+                member is not None
+                and channel.permissions_for(member).read_message_history
+            )
+        if not allowed:
+            raise MessageLinkError("Canal introuvable.")
+
+    async def resolve(self, link: str, author=None) -> discord.Message:
+        """
+        Résout un lien ; lève MessageLinkError si impossible.
+        Sans `author`, aucun contrôle d'accès : réservé aux appels internes.
+        """
+        parsed = parse_message_link(link)
+        if parsed is None:
+            raise MessageLinkError("Lien de message invalide.")
+        guild_id, channel_id, message_id = parsed
+
+        message = self._get_cached_message(message_id)
+        if message is not None and message.channel.id == channel_id:
+            message_guild = getattr(message, "guild", None)
+            if guild_id is None or getattr(message_guild, "id", None) == guild_id:
+                if author is not None:
+                    self._check_access(message.channel, author)
+                return message
+
+        channel = await self._resolve_channel(guild_id, channel_id)
+        if author is not None:
+            # Avant tout appel REST, pour ne rien révéler du canal.
+            self._check_access(channel, author)
+        try:
+            message = await channel.fetch_message(message_id)
+        except discord.NotFound:
+            raise MessageLinkError("Message introuvable.")
+        except discord.Forbidden:
+            raise MessageLinkError("Accès au message refusé.")
+
+        self._cache_put(message)
+        return message
+
+    async def resolve_many(
+        self, links: Iterable[str], concurrency: int = 5
+    ) -> List[Optional[discord.Message]]:
+        """
+        Résout plusieurs liens en parallèle (au plus `concurrency` à la fois).
+        Retourne une liste alignée sur `links`, None pour les liens en échec.
+        """
+        links = list(links)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        pending: Dict[str, "asyncio.Future"] = {}
+
+        async def resolve_one(link: str) -> Optional[discord.Message]:
+            async with semaphore:
+                try:
+                    return await self.resolve(link)
+                except (MessageLinkError, discord.HTTPException):
+                    return None
+
+        for link in links:
+            if link not in pending:
+                pending[link] = asyncio.ensure_future(resolve_one(link))
+
+        await asyncio.gather(*pending.values())
+        return [pending[link].result() for link in links]
+
+
+async def get_message_from_link(ctx, link, resolver: Optional[MessageResolver] = None):
+    """
+    Récupère un message à partir d'un lien (résolveur partagé du bot par
+    défaut), seulement s'il est lisible par l'auteur de la commande.
+    """
+    resolver = resolver or MessageResolver.for_bot(ctx.bot)
+    try:
+        return await resolver.resolve(link, author=ctx.author)
+    except MessageLinkError as e:
+        await ctx.send(str(e))
+    except discord.HTTPException:
+        await ctx.send("Message introuvable.")
     return None